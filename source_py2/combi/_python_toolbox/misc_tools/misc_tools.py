@@ -351,6 +351,8 @@ class AlternativeLengthMixin(object):
     number that `len` supports, it'll return that, otherwise it'll show a
     helpful error message.
     '''
+    __slots__ = ()
+    
     def __len__(self):
         length = self.length
         if (length <= sys.maxsize) and isinstance(length, int):
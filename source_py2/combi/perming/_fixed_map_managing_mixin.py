@@ -23,7 +23,7 @@ class _FixedMapManagingMixin(object):
         '''
         if not self.fixed_map:
             return ()
-        return tuple(map(self.domain.index, self.fixed_map))
+        return tuple(map(self._get_index_of_domain_item, self.fixed_map))
     
     free_indices = caching.CachedProperty(
         lambda self: tuple(item for item in range(self.sequence_length)
@@ -79,16 +79,20 @@ class _FixedMapManagingMixin(object):
     @caching.CachedProperty
     def _undapplied_fixed_map(self):
         if self.is_dapplied:
-            return dict((self.domain.index(key), value) for key, value
-                    in self.fixed_map.items())
+            return dict((self._indices_of_domain_items[key], value) for
+                        key, value in self.fixed_map.items())
         else:
             return self.fixed_map
             
     @caching.CachedProperty
     def _undapplied_unrapplied_fixed_map(self):
         if self.is_dapplied or self.is_rapplied:
-            return dict((self.domain.index(key), self.sequence.index(value))
-                    for key, value in self.fixed_map.items())
+            positions_of_sequence_items = self._positions_of_sequence_items
+            return dict(
+                (self._get_index_of_domain_item(key),
+                                        positions_of_sequence_items[value][0])
+                for key, value in self.fixed_map.items()
+            )
         else:
             return self.fixed_map
         
@@ -0,0 +1,329 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import bisect
+
+from combi._python_toolbox import caching
+from combi._python_toolbox import nifty_collections
+
+from . import combinadic
+from .calculating_length import *
+
+# (`UnrecurrentedPerm` exported to here from `perm_space.py` to avoid import
+# loop.)
+
+
+class _RankingMixin(object):
+    '''
+    Mixin for `PermSpace` to get the index numbers of many perms at once.
+    
+    `PermSpace.index` goes through coercing the perm to the space's
+    `perm_type`, checking it against the space, and, for some variations,
+    creating a sub-space for every candidate value. When we have a lot of perms
+    to rank, we prepare a ranking function once per space and rank raw perm
+    sequences with it.
+    '''
+    
+    def index_many(self, perms):
+        '''
+        Get the index numbers of `perms` in this space, as a list.
+        
+        This is like `[perm_space.index(perm) for perm in perms]`, except
+        faster. Each perm may be a `Perm` of this space or a raw sequence like
+        a tuple or a list. Raises `ValueError` if any of the perms isn't in
+        this space.
+        '''
+        perm_sequence_ranker = self._perm_sequence_ranker
+        canonical_slice = self.canonical_slice
+        index_numbers = []
+        for perm in perms:
+            perm_number = None
+            if perm_sequence_ranker is not None:
+                perm_sequence = self._get_raw_perm_sequence(perm)
+                if perm_sequence is not None:
+                    perm_number = perm_sequence_ranker(perm_sequence)
+            if perm_number is None:
+                index_numbers.append(self.index(perm))
+            elif perm_number not in canonical_slice:
+                raise ValueError
+            else:
+                index_numbers.append(perm_number - canonical_slice.start)
+        return index_numbers
+    
+    
+    def _get_raw_perm_sequence(self, perm):
+        '''
+        Get `perm` as a tuple that `_perm_sequence_ranker` can rank.
+        
+        Returns `None` if `perm` is something that only `index` knows how to
+        handle.
+        '''
+        if isinstance(perm, (tuple, list)):
+            perm_sequence = tuple(perm)
+        elif isinstance(perm, self.perm_type) and \
+                    not isinstance(perm, UnrecurrentedPerm) and \
+                    perm.nominal_perm_space.sequence == self.sequence and \
+                    perm.domain == self.domain:
+            perm_sequence = tuple(perm._perm_sequence)
+        else:
+            return None
+        if len(perm_sequence) != self.n_elements:
+            return None
+        return perm_sequence
+    
+    
+    @caching.CachedProperty
+    def _perm_sequence_ranker(self):
+        '''
+        Function that gets the unsliced index number of a raw perm sequence.
+        
+        The function returns `None` for anything it can't rank, including
+        sequences that aren't in the space, so `index` could deal with them.
+        This property is `None` for spaces that have no such function.
+        '''
+        if self.is_sliced:
+            return self.unsliced._perm_sequence_ranker
+        elif self.is_dapplied:
+            return self.undapplied._perm_sequence_ranker
+        elif self.is_degreed:
+            return self._make_degreed_perm_sequence_ranker()
+        elif self.is_recurrent:
+            if self.is_fixed:
+                return None
+            return self._make_recurrent_perm_sequence_ranker()
+        elif self.is_fixed:
+            return self._make_fixed_perm_sequence_ranker()
+        elif self.is_combination:
+            return self._make_combination_perm_sequence_ranker()
+        else:
+            return self._make_lexicographic_perm_sequence_ranker()
+    
+    
+    def _make_lexicographic_perm_sequence_ranker(self):
+        '''
+        Make a ranker for a space that's pure, except rapplied or partial.
+        
+        Each item contributes the number of unused items before it in the
+        sequence, times the number of ways to arrange the items after it.
+        '''
+        index_of_value = dict((value, i) for i, value in
+                              enumerate(self.sequence))
+        n_elements = self.n_elements
+        weights = [1] * n_elements
+        for j in range(n_elements - 2, -1, -1):
+            weights[j] = weights[j + 1] * (self.sequence_length - 1 - j)
+        
+        def rank(perm_sequence):
+            used_indices = []
+            perm_number = 0
+            for value, weight in zip(perm_sequence, weights):
+                try:
+                    i = index_of_value[value]
+                except (KeyError, TypeError):
+                    return None
+                n_used_indices_before = bisect.bisect_left(used_indices, i)
+                if n_used_indices_before < len(used_indices) and \
+                                     used_indices[n_used_indices_before] == i:
+                    return None
+                used_indices.insert(n_used_indices_before, i)
+                perm_number += (i - n_used_indices_before) * weight
+            return perm_number
+        
+        return rank
+    
+    
+    def _make_fixed_perm_sequence_ranker(self):
+        '''
+        Make a ranker for a fixed, non-recurrent, non-degreed space.
+        
+        We check the fixed items and rank the free ones in the space of free
+        values.
+        '''
+        fixed_map = self.fixed_map
+        free_indices = [i for i in range(self.n_elements) if
+                                                            i not in fixed_map]
+        free_values_perm_space = self._free_values_unsliced_perm_space
+        free_values_ranker = free_values_perm_space._perm_sequence_ranker
+        
+        def rank(perm_sequence):
+            for i, value in fixed_map.items():
+                if perm_sequence[i] != value:
+                    return None
+            return free_values_ranker(
+                tuple(perm_sequence[i] for i in free_indices)
+            )
+        
+        return rank
+    
+    
+    def _make_combination_perm_sequence_ranker(self):
+        '''Make a ranker for a non-recurrent combination space.'''
+        index_of_value = dict((value, i) for i, value in
+                              enumerate(self.sequence))
+        sequence_length = self.sequence_length
+        
+        def rank(perm_sequence):
+            try:
+                indices = [index_of_value[value] for value in perm_sequence]
+            except (KeyError, TypeError):
+                return None
+            if any(i >= j for i, j in zip(indices, indices[1:])):
+                return None
+            return combinadic.rank_combination(indices, sequence_length)
+        
+        return rank
+    
+    
+    def _make_degreed_perm_sequence_ranker(self):
+        '''
+        Make a ranker for a degreed space, which may be rapplied or fixed.
+        
+        We go over the same tree of candidates that `__getitem__` goes over.
+        We keep track of the chains formed by the items that already have a
+        value, so we can tell in constant time whether a lower value would
+        close a cycle, and then `_degreed_length_table` tells us how many perms
+        start with it, without creating any sub-spaces.
+        '''
+        index_of_value = dict((value, i) for i, value in
+                              enumerate(self.sequence))
+        fixed_map = self._undapplied_unrapplied_fixed_map
+        sequence_length = self.sequence_length
+        length_table = self._degreed_length_table
+        free_values = sorted(set(range(sequence_length)) -
+                                                        set(fixed_map.values()))
+        n_cycles_in_fixed_items = self._n_cycles_in_fixed_items_of_just_fixed
+        
+        def rank(perm_sequence):
+            try:
+                pure_perm_sequence = [index_of_value[value] for value in
+                                                                 perm_sequence]
+            except (KeyError, TypeError):
+                return None
+            if len(set(pure_perm_sequence)) != sequence_length:
+                return None
+            for j, value in fixed_map.items():
+                if pure_perm_sequence[j] != value:
+                    return None
+            
+            # Chains of items that have a value, keyed by their two ends:
+            end_of_chain = {}
+            start_of_chain = {}
+            
+            def link(j, value):
+                chain_start = start_of_chain.pop(j, j)
+                chain_end = end_of_chain.pop(value, value)
+                if chain_end != j:
+                    end_of_chain[chain_start] = chain_end
+                    start_of_chain[chain_end] = chain_start
+                    
+            for j, value in fixed_map.items():
+                link(j, value)
+                
+            unused_values = list(free_values)
+            n_free_items = len(free_values)
+            n_cycles = n_cycles_in_fixed_items
+            perm_number = 0
+            for j, value in enumerate(pure_perm_sequence):
+                if j in fixed_map:
+                    continue
+                n_free_items -= 1
+                for unused_value in unused_values:
+                    closed_cycle = (end_of_chain.get(unused_value,
+                                                     unused_value) == j)
+                    if unused_value == value:
+                        break
+                    perm_number += \
+                             length_table[n_free_items][n_cycles + closed_cycle]
+                if not length_table[n_free_items][n_cycles + closed_cycle]:
+                    # This perm has the wrong degree.
+                    return None
+                n_cycles += closed_cycle
+                unused_values.remove(value)
+                link(j, value)
+            return perm_number
+        
+        return rank
+    
+    
+    def _make_recurrent_perm_sequence_ranker(self):
+        '''
+        Make a ranker for a recurrent space that isn't fixed.
+        
+        This follows the recurrent branch of `index`, except that instead of
+        creating a sub-space for every lower value to get its length, we
+        calculate the length straight from the counts of the values that would
+        be left.
+        '''
+        sequence = self.sequence
+        n_elements = self.n_elements
+        is_combination = self.is_combination
+        positions = {}
+        for i, value in enumerate(sequence):
+            positions.setdefault(value, []).append(i)
+            
+        def get_first_unused_position(value, n_removed):
+            return positions[value][n_removed[value]]
+        
+        def get_sub_perm_space_length(n_elements_left, counts):
+            counts = [count for count in counts if count]
+            if n_elements_left > sum(counts):
+                return 0
+            fbb = nifty_collections.FrozenBagBag(counts)
+            if is_combination:
+                return calculate_length_of_recurrent_comb_space(
+                    n_elements_left, fbb
+                )
+            else:
+                return calculate_length_of_recurrent_perm_space(
+                    n_elements_left, fbb
+                )
+        
+        def rank(perm_sequence):
+            n_removed = dict.fromkeys(positions, 0)
+            shit_set = set()
+            perm_number = 0
+            for j, value in enumerate(perm_sequence):
+                try:
+                    if n_removed[value] == len(positions[value]):
+                        return None
+                except (KeyError, TypeError):
+                    return None
+                key = get_first_unused_position(value, n_removed)
+                lower_values = sorted(
+                    (
+                        other_value for other_value, other_positions in
+                        positions.items() if other_value not in shit_set and
+                        n_removed[other_value] < len(other_positions) and
+                        other_positions[n_removed[other_value]] < key
+                    ),
+                    key=lambda other_value:
+                            get_first_unused_position(other_value, n_removed)
+                )
+                for lower_value in lower_values:
+                    if is_combination:
+                        cut = get_first_unused_position(lower_value,
+                                                        n_removed)
+                        counts = [
+                            len(other_positions) -
+                                     bisect.bisect_right(other_positions, cut)
+                            for other_value, other_positions in
+                            positions.items() if other_value not in shit_set
+                        ]
+                    else:
+                        counts = [
+                            len(other_positions) - n_removed[other_value] -
+                                                  (other_value == lower_value)
+                            for other_value, other_positions in
+                                                              positions.items()
+                        ]
+                    perm_number += get_sub_perm_space_length(
+                        n_elements - j - 1, counts
+                    )
+                    if is_combination:
+                        shit_set.add(lower_value)
+                if value in shit_set:
+                    return None
+                n_removed[value] += 1
+            return perm_number
+        
+        return rank
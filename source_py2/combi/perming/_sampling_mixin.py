@@ -0,0 +1,225 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import random
+import numbers
+
+from combi._python_toolbox import caching
+from combi._python_toolbox import math_tools
+
+from . import calculating_length
+
+
+class _SamplingMixin(object):
+    '''
+    Mixin for `PermSpace` to take random perms.
+    
+    Taking a random perm by index number means unranking it, which for some
+    variations means creating a sub-space for every candidate value. Where we
+    can, we make the random perm directly instead: by a partial Fisher-Yates
+    shuffle for most spaces, by drawing how many copies of each item to use
+    and shuffling them for partial recurrent spaces, and by drawing the number
+    of cycles and then building the cycles for degreed spaces. Sliced spaces,
+    recurrent combination spaces and a few other combinations of variations
+    fall back to unranking a random index number.
+    '''
+    
+    def sample(self, k, replace=True, rng=None, raw=False):
+        '''
+        Take a list of `k` random perms from this space.
+        
+        Every perm in the space is equally likely. If `replace=False` is
+        given, the perms will all be different, and `k` may not be bigger than
+        the length of the space.
+        
+        `rng` may be a `random.Random` object or a seed for one; samples taken
+        with the same seed on the same Python version are the same. (Different
+        versions of `random.Random` sample and shuffle differently.) By
+        default the global random number generator of the `random` module is
+        used. If `raw=True` is given, the perms are plain tuples instead, like
+        in `iter_raw`.
+        '''
+        if rng is None:
+            rng = random
+        elif isinstance(rng, numbers.Integral):
+            rng = random.Random(rng)
+        if k < 0:
+            raise ValueError('`k` must be positive or zero.')
+        if k > 0 and not self.length:
+            raise ValueError("Can't take a sample from an empty space.")
+        if not replace and k > self.length:
+            raise ValueError("Can't take a sample of %s different perms from "
+                             "a space of length %s." % (k, self.length))
+        
+        get_random_perm_sequence = self._get_random_perm_sequence_getter()
+        if replace:
+            perm_sequences = [get_random_perm_sequence(rng) for _ in
+                                                                     range(k)]
+        elif 2 * k > self.length:
+            # The space is small, so we can afford to choose index numbers:
+            perm_sequences = self.get_many(rng.sample(range(self.length), k),
+                                           raw=True)
+        else:
+            # Drawing perms until we have enough different ones. Since we need
+            # at most half of the space, this takes at most twice as many
+            # draws on average.
+            perm_sequences = []
+            seen_perm_sequences = set()
+            while len(perm_sequences) < k:
+                perm_sequence = get_random_perm_sequence(rng)
+                if perm_sequence not in seen_perm_sequences:
+                    seen_perm_sequences.add(perm_sequence)
+                    perm_sequences.append(perm_sequence)
+        
+        if raw:
+            return perm_sequences
+        return [self.perm_type(perm_sequence, self) for perm_sequence in
+                                                                perm_sequences]
+    
+    
+    def take_random(self):
+        '''Take a random perm from this space.'''
+        return self.sample(1)[0]
+    
+    
+    def _get_random_perm_sequence_getter(self):
+        '''
+        Get a function that takes an `rng` and makes a random perm sequence.
+        '''
+        sequence = tuple(self.sequence)
+        n_elements = self.n_elements
+        if self.is_sliced or (self.is_fixed and (self.is_degreed or
+                              self.is_combination or self.is_recurrent and
+                                                            self.is_partial)):
+            return lambda rng: tuple(self[rng.randrange(self.length)])
+        elif self.is_degreed:
+            return self._get_random_degreed_perm_sequence_getter()
+        elif self.is_fixed:
+            fixed_map = self._undapplied_fixed_map
+            free_values = tuple(self.free_values)
+            n_free_values = n_elements - len(fixed_map)
+            def get_random_perm_sequence(rng):
+                free_values_iterator = iter(rng.sample(free_values,
+                                                       n_free_values))
+                return tuple(
+                    fixed_map[i] if i in fixed_map else
+                    next(free_values_iterator) for i in range(n_elements)
+                )
+            return get_random_perm_sequence
+        elif self.is_combination:
+            if self.is_recurrent:
+                return lambda rng: tuple(self[rng.randrange(self.length)])
+            indices = range(self.sequence_length)
+            return lambda rng: tuple(
+                sequence[i] for i in sorted(rng.sample(indices, n_elements))
+            )
+        elif self.is_recurrent and self.is_partial:
+            return self._get_random_partial_recurrent_perm_sequence
+        else:
+            # For a recurrent space that isn't partial, this is uniform too,
+            # because every distinct perm comes from the same number of
+            # shuffles of the sequence.
+            return lambda rng: tuple(rng.sample(sequence, n_elements))
+    
+    
+    def _get_random_degreed_perm_sequence_getter(self):
+        '''
+        Get a function that makes random perm sequences of a degreed space.
+        
+        A perm of degree `d` has `n - d` cycles, and the number of perms with
+        `c` cycles is the unsigned Stirling number of the first kind of `n` and
+        `c`. We first draw the number of cycles, and then we decide for each
+        item from the last to the first whether it starts a new cycle, using
+        `c(m, c) = c(m-1, c-1) + (m-1) * c(m-1, c)`. Building the perm from the
+        first item to the last, an item that doesn't start a new cycle goes
+        right after one of the items before it, chosen uniformly.
+        '''
+        n = self.sequence_length
+        sequence = self.sequence if self.is_rapplied else None
+        stirling_rows = [math_tools.stirling_table.row(m) for m in
+                                                                range(n + 1)]
+        n_cycles_options = [n - degree for degree in self.degrees]
+        weights = [stirling_rows[n][n_cycles] for n_cycles in
+                                                              n_cycles_options]
+        total_weight = sum(weights)
+        
+        def get_random_perm_sequence(rng):
+            ### Drawing the number of cycles: #################################
+            #                                                                 #
+            wip_number = rng.randrange(total_weight)
+            for n_cycles, weight in zip(n_cycles_options, weights):
+                if wip_number < weight:
+                    break
+                wip_number -= weight
+            #                                                                 #
+            ### Finished drawing the number of cycles. ########################
+            
+            starts_cycle = [None] * n
+            for m in range(n, 0, -1):
+                is_starting = rng.randrange(stirling_rows[m][n_cycles]) < \
+                                            stirling_rows[m - 1][n_cycles - 1]
+                starts_cycle[m - 1] = is_starting
+                n_cycles -= is_starting
+            
+            perm_sequence = list(range(n))
+            for m in range(n):
+                if not starts_cycle[m]:
+                    j = rng.randrange(m)
+                    perm_sequence[m] = perm_sequence[j]
+                    perm_sequence[j] = m
+            if sequence is not None:
+                return tuple(sequence[i] for i in perm_sequence)
+            return tuple(perm_sequence)
+        
+        return get_random_perm_sequence
+    
+    
+    @caching.CachedProperty
+    def _partial_recurrent_sampling_tables(self):
+        '''
+        Tables for making random perm sequences of a partial recurrent space.
+        
+        Table `i` has, for every `n` up to `n_elements`, the number of perms of
+        length `n` that use only the items from item `i` onwards. (These are
+        the coefficients of a generating function, like in the
+        `'polynomial'` engine of `calculate_length_of_recurrent_perm_space`.)
+        '''
+        n_elements = self.n_elements
+        tables = [[1]]
+        for count in reversed(tuple(self._frozen_ordered_bag.values())):
+            tables.append(calculating_length._multiply_exponential_polynomials(
+                tables[-1], [1] * (min(count, n_elements) + 1), n_elements
+            ))
+        tables.reverse()
+        return tables
+    
+    
+    def _get_random_partial_recurrent_perm_sequence(self, rng):
+        '''
+        Make a random perm sequence of a partial recurrent space.
+        
+        We draw how many copies of each item to use, weighting each option by
+        the number of perms that can be made with it, and then we shuffle the
+        copies.
+        '''
+        tables = self._partial_recurrent_sampling_tables
+        n_left = self.n_elements
+        values = []
+        for i, (value, count) in enumerate(self._frozen_ordered_bag.items()):
+            if not n_left:
+                break
+            next_table = tables[i + 1]
+            wip_number = rng.randrange(tables[i][n_left])
+            binomial = 1
+            for n_copies in range(min(count, n_left) + 1):
+                if n_copies:
+                    binomial = binomial * (n_left - n_copies + 1) // n_copies
+                if n_left - n_copies < len(next_table):
+                    weight = binomial * next_table[n_left - n_copies]
+                    if wip_number < weight:
+                        break
+                    wip_number -= weight
+            values.extend([value] * n_copies)
+            n_left -= n_copies
+        rng.shuffle(values)
+        return tuple(values)
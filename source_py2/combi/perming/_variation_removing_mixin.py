@@ -32,8 +32,8 @@ class _VariationRemovingMixin(object):
         return PermSpace(
             self.sequence_length, n_elements=self.n_elements,
             domain=self.domain, 
-            fixed_map=dict((key, self.sequence.index(value)) for
-                       key, value in self.fixed_map.items()), 
+            fixed_map=dict((key, self._positions_of_sequence_items[value][0])
+                           for key, value in self.fixed_map.items()), 
             degrees=self.degrees, slice_=self.canonical_slice,
             is_combination=self.is_combination, perm_type=self.perm_type
         )
@@ -43,7 +43,8 @@ class _VariationRemovingMixin(object):
         '''A version of this `PermSpace` with no recurrences.'''
         from .perm import UnrecurrentedPerm
         from .comb import UnrecurrentedComb
-        assert self.is_recurrent # Otherwise was overridden in `__init__`
+        if not self.is_recurrent:
+            return self
         if self.is_sliced:
             raise TypeError(
                 "You can't get an unrecurrented version of a sliced "
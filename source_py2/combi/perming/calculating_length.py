@@ -1,14 +1,156 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+import json
 import itertools
+import threading
 
 from combi._python_toolbox import nifty_collections
 
 
-_length_of_recurrent_perm_space_cache = {}
+class LengthCache(object):
+    '''
+    Bounded cache for the lengths of recurrent spaces.
+    
+    Keys are tuples of `(k, fbb)` and values are lengths. When there are more
+    than `max_size` entries, the least recently used ones are thrown away.
+    (Pass `max_size=None` for no limit.) The cache keeps count of its hits and
+    misses, and it can be saved to a file with `save` and loaded with `load`,
+    so a process can start with lengths that were calculated in advance.
+    
+    The cache is thread-safe.
+    '''
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.hits = 0
+        '''Number of lookups that found their key in the cache.'''
+        self.misses = 0
+        '''Number of lookups that didn't find their key in the cache.'''
+        self._dict = nifty_collections.OrderedDict()
+        self.lock = threading.Lock()
+        '''Lock used while changing the cache to make it thread-safe.'''
+        
+    def __len__(self):
+        return len(self._dict)
+    
+    def __contains__(self, key):
+        return key in self._dict
+    
+    def get(self, key, default=None):
+        '''Get the length for `key`, or `default` if it's not cached.'''
+        with self.lock:
+            try:
+                value = self._dict[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._dict.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def __setitem__(self, key, value):
+        with self.lock:
+            self._dict[key] = value
+            self._dict.move_to_end(key)
+            if self.max_size is not None:
+                while len(self._dict) > self.max_size:
+                    self._dict.popitem(last=False)
+                    
+    def clear(self):
+        '''Remove all entries and reset the hit and miss counts.'''
+        with self.lock:
+            self._dict.clear()
+            self.hits = self.misses = 0
+            
+    def get_stats(self):
+        '''Get a dict with the `hits`, `misses`, `size` and `max_size`.'''
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._dict), 'max_size': self.max_size}
+    
+    def save(self, path):
+        '''Save the cached lengths to a file at `path`.'''
+        with self.lock:
+            items = list(self._dict.items())
+        with open(path, 'w') as file:
+            json.dump(
+                [[k, sorted(fbb.items()), value] for (k, fbb), value in items],
+                file
+            )
+            
+    def load(self, path):
+        '''
+        Load lengths that were saved with `save` from the file at `path`.
+        
+        The loaded lengths are added as the most recently used entries.
+        '''
+        with open(path) as file:
+            entries = json.load(file)
+        try:
+            items = [
+                ((k, nifty_collections.FrozenBagBag(dict(fbb_items))), value)
+                                             for k, fbb_items, value in entries
+            ]
+        except (TypeError, ValueError):
+            raise ValueError("%r isn't a saved length cache." % path)
+        for key, value in items:
+            self[key] = value
+            
+
+def _multiply_polynomials(a, b, k):
+    '''Multiply two polynomials, dropping the terms of degree above `k`.'''
+    result = [0] * min(len(a) + len(b) - 1, k + 1)
+    for i, a_coefficient in enumerate(a):
+        if a_coefficient:
+            for j in range(min(len(b), k + 1 - i)):
+                result[i + j] += a_coefficient * b[j]
+    return result
+
+
+def _multiply_exponential_polynomials(a, b, k):
+    '''
+    Multiply two exponential generating functions up to degree `k`.
+    
+    The coefficient of degree `n` is kept multiplied by `n!`, so it stays an
+    integer, which makes the product a binomial convolution.
+    '''
+    result = [0] * min(len(a) + len(b) - 1, k + 1)
+    for i, a_coefficient in enumerate(a):
+        if a_coefficient:
+            binomial = 1
+            for j in range(min(len(b), k + 1 - i)):
+                if j:
+                    binomial = binomial * (i + j) // j
+                result[i + j] += a_coefficient * b[j] * binomial
+    return result
+
+
+def _calculate_length_with_polynomials(k, fbb, multiply):
+    '''
+    Calculate a recurrent length as a coefficient of a generating function.
+    
+    Each item with `m` recurrences contributes a factor of
+    `1 + x + ... + x ** m`, or `1 + x + ... + x ** m / m!` for perms. Items
+    with the same number of recurrences contribute the same factor, which we
+    raise to their count by repeated squaring. `multiply` is the function
+    used to multiply two polynomials.
+    '''
+    product = [1]
+    for n_recurrences, n_items in fbb.items():
+        factor = [1] * (min(n_recurrences, k) + 1)
+        while n_items:
+            if n_items % 2:
+                product = multiply(product, factor, k)
+            n_items //= 2
+            if n_items:
+                factor = multiply(factor, factor, k)
+    return product[k] if k < len(product) else 0
+
+
+length_of_recurrent_perm_space_cache = LengthCache()
+'''The default cache of `calculate_length_of_recurrent_perm_space`.'''
 
-def calculate_length_of_recurrent_perm_space(k, fbb):
+def calculate_length_of_recurrent_perm_space(k, fbb, cache=None,
+                                             engine=None):
     '''
     Calculate the length of a recurrent `PermSpace`.
     
@@ -20,8 +162,20 @@ def calculate_length_of_recurrent_perm_space(k, fbb):
     
     It's assumed that the space is not a `CombSpace`, it's not fixed, not
     degreed and not sliced.
+    
+    Lengths are cached in `cache`, which defaults to the module's
+    `LengthCache`. Any object with `get` and `__setitem__`, like a `dict`, can
+    be used instead.
+    
+    `engine` is the algorithm used: `'polynomial'` reads the length off a
+    generating function, and `'fbb'` solves every sub-FBB, storing all of the
+    solutions in the cache. The default is `'polynomial'`, which is faster at
+    every size we benchmarked.
     '''
-    cache = _length_of_recurrent_perm_space_cache
+    if engine not in (None, 'polynomial', 'fbb'):
+        raise ValueError("`engine` must be either 'polynomial' or 'fbb'.")
+    if cache is None:
+        cache = length_of_recurrent_perm_space_cache
     if not isinstance(fbb, nifty_collections.FrozenBagBag):
         fbb = nifty_collections.FrozenBagBag(fbb)
     ### Checking for edge cases: ##############################################
@@ -36,10 +190,15 @@ def calculate_length_of_recurrent_perm_space(k, fbb):
     #                                                                         #
     ### Finished checking for edge cases. #####################################
     
-    try:
-        return cache[(k, fbb)]
-    except KeyError:
-        pass
+    length = cache.get((k, fbb))
+    if length is not None:
+        return length
+    if engine != 'fbb':
+        length = _calculate_length_with_polynomials(
+            k, fbb, _multiply_exponential_polynomials
+        )
+        cache[(k, fbb)] = length
+        return length
 
     # This is a 2-phase algorithm, similar to recursion but not really
     # recursion since we don't want to abuse the stack.
@@ -53,19 +212,26 @@ def calculate_length_of_recurrent_perm_space(k, fbb):
     # simplest ones and making our way up to the original FBB. The simplest
     # FBBs will be solved trivially, and then as they get progressively more
     # complex, each FBB will be solved using the solutions of its sub-FBB.
-    # Every solution will be stored in the global cache.
+    # Every solution will be stored in the cache. Solutions are also kept in
+    # `solutions` until we're done, because the cache might throw them away.
 
     
     ### Doing phase one, getting all sub-FBBs: ################################
     #                                                                         #
-    levels = []
-    current_fbbs = set((fbb,))
+    # We already know that `fbb` isn't in the cache:
+    levels = [{fbb: fbb.get_sub_fbbs_for_one_key_removed()}]
+    solutions = {}
+    current_fbbs = set(levels[0][fbb])
     while len(levels) < k and current_fbbs:
         k_ = k - len(levels)
-        levels.append(
-            dict((fbb_, fbb_.get_sub_fbbs_for_one_key_removed())
-             for fbb_ in current_fbbs if (k_, fbb_) not in cache)
-        )
+        level = {}
+        for fbb_ in current_fbbs:
+            length = cache.get((k_, fbb_))
+            if length is None:
+                level[fbb_] = fbb_.get_sub_fbbs_for_one_key_removed()
+            else:
+                solutions[(k_, fbb_)] = length
+        levels.append(level)
         current_fbbs = set(itertools.chain(*levels[-1].values()))
     #                                                                         #
     ### Finished doing phase one, getting all sub-FBBs. #######################
@@ -75,26 +241,30 @@ def calculate_length_of_recurrent_perm_space(k, fbb):
     for k_, level in enumerate(reversed(levels), (k - len(levels) + 1)):
         if k_ == 1:
             for fbb_, sub_fbb_bag in level.items():
-                cache[(k_, fbb_)] = fbb_.n_elements
+                solutions[(k_, fbb_)] = fbb_.n_elements
         else:
             for fbb_, sub_fbb_bag in level.items():
-                cache[(k_, fbb_)] = sum(
-                    (cache[(k_ - 1, sub_fbb)] * factor for
+                solutions[(k_, fbb_)] = sum(
+                    (solutions[(k_ - 1, sub_fbb)] * factor for
                            sub_fbb, factor in sub_fbb_bag.items())
                 )
+        for fbb_ in level:
+            cache[(k_, fbb_)] = solutions[(k_, fbb_)]
     #                                                                         #
     ### Finished doing phase two, solving FBBs from trivial to complex. #######
     
-    return cache[(k, fbb)]
+    return solutions[(k, fbb)]
         
     
 
 
 ###############################################################################
 
-_length_of_recurrent_comb_space_cache = {}
+length_of_recurrent_comb_space_cache = LengthCache()
+'''The default cache of `calculate_length_of_recurrent_comb_space`.'''
 
-def calculate_length_of_recurrent_comb_space(k, fbb):
+def calculate_length_of_recurrent_comb_space(k, fbb, cache=None,
+                                             engine=None):
     '''
     Calculate the length of a recurrent `CombSpace`.
     
@@ -105,8 +275,20 @@ def calculate_length_of_recurrent_comb_space(k, fbb):
     for more info.)
     
     It's assumed that the space is not fixed, not degreed and not sliced.
+    
+    Lengths are cached in `cache`, which defaults to the module's
+    `LengthCache`. Any object with `get` and `__setitem__`, like a `dict`, can
+    be used instead.
+    
+    `engine` is the algorithm used: `'polynomial'` reads the length off a
+    generating function, and `'fbb'` solves every sub-FBB, storing all of the
+    solutions in the cache. The default is `'polynomial'`, which is faster at
+    every size we benchmarked.
     '''
-    cache = _length_of_recurrent_comb_space_cache
+    if engine not in (None, 'polynomial', 'fbb'):
+        raise ValueError("`engine` must be either 'polynomial' or 'fbb'.")
+    if cache is None:
+        cache = length_of_recurrent_comb_space_cache
     if not isinstance(fbb, nifty_collections.FrozenBagBag):
         fbb = nifty_collections.FrozenBagBag(fbb)
     ### Checking for edge cases: ##############################################
@@ -121,10 +303,15 @@ def calculate_length_of_recurrent_comb_space(k, fbb):
     #                                                                         #
     ### Finished checking for edge cases. #####################################
 
-    try:
-        return cache[(k, fbb)]
-    except KeyError:
-        pass
+    length = cache.get((k, fbb))
+    if length is not None:
+        return length
+    if engine != 'fbb':
+        length = _calculate_length_with_polynomials(
+            k, fbb, _multiply_polynomials
+        )
+        cache[(k, fbb)] = length
+        return length
     
     # This is a 2-phase algorithm, similar to recursion but not really
     # recursion since we don't want to abuse the stack.
@@ -138,19 +325,29 @@ def calculate_length_of_recurrent_comb_space(k, fbb):
     # simplest ones and making our way up to the original FBB. The simplest
     # FBBs will be solved trivially, and then as they get progressively more
     # complex, each FBB will be solved using the solutions of its sub-FBB.
-    # Every solution will be stored in the global cache.
+    # Every solution will be stored in the cache. Solutions are also kept in
+    # `solutions` until we're done, because the cache might throw them away.
 
     
     ### Doing phase one, getting all sub-FBBs: ################################
     #                                                                         #
-    levels = []
-    current_fbbs = set((fbb,))
+    # We already know that `fbb` isn't in the cache:
+    levels = [
+        {fbb: fbb.get_sub_fbbs_for_one_key_and_previous_piles_removed()}
+    ]
+    solutions = {}
+    current_fbbs = set(levels[0][fbb])
     while len(levels) < k and current_fbbs:
         k_ = k - len(levels)
-        levels.append(
-            dict((fbb_, fbb_.get_sub_fbbs_for_one_key_and_previous_piles_removed())
-             for fbb_ in current_fbbs if (k_, fbb_) not in cache)
-        )
+        level = {}
+        for fbb_ in current_fbbs:
+            length = cache.get((k_, fbb_))
+            if length is None:
+                level[fbb_] = \
+                  fbb_.get_sub_fbbs_for_one_key_and_previous_piles_removed()
+            else:
+                solutions[(k_, fbb_)] = length
+        levels.append(level)
         current_fbbs = set(itertools.chain(*levels[-1].values()))
     #                                                                         #
     ### Finished doing phase one, getting all sub-FBBs. #######################
@@ -160,16 +357,18 @@ def calculate_length_of_recurrent_comb_space(k, fbb):
     for k_, level in enumerate(reversed(levels), (k - len(levels) + 1)):
         if k_ == 1:
             for fbb_, sub_fbbs in level.items():
-                cache[(k_, fbb_)] = len(sub_fbbs)
+                solutions[(k_, fbb_)] = len(sub_fbbs)
         else:
             for fbb_, sub_fbbs in level.items():
-                cache[(k_, fbb_)] = sum(
-                    (cache[(k_ - 1, sub_fbb)] for sub_fbb in sub_fbbs)
+                solutions[(k_, fbb_)] = sum(
+                    (solutions[(k_ - 1, sub_fbb)] for sub_fbb in sub_fbbs)
                 )
+        for fbb_ in level:
+            cache[(k_, fbb_)] = solutions[(k_, fbb_)]
     #                                                                         #
     ### Finished doing phase two, solving FBBs from trivial to complex. #######
     
-    return cache[(k, fbb)]
+    return solutions[(k, fbb)]
         
     
             
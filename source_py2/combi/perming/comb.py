@@ -26,6 +26,8 @@ class Comb(Perm):
         6
     
     '''
+    __slots__ = ()
+    
     def __init__(self, perm_sequence, perm_space=None):
         # Unlike for `Perm`, we must have a `perm_space` in the arguments. It
         # can either be in the `perm_space` argument, or if the `perm_sequence`
@@ -39,6 +41,7 @@ class Comb(Perm):
 
 class UnrecurrentedComb(UnrecurrentedPerm, Comb):
     '''A combination in a space that's been unrecurrented.'''
+    __slots__ = ()
         
         
         
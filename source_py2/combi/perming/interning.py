@@ -0,0 +1,146 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Sharing equal `PermSpace` objects instead of creating them again.
+
+Creating a `PermSpace` checks its sequence, domain and fixed map, which takes
+time for big spaces. Spaces are created all the time behind the scenes: every
+`.unsliced`, `.unfixed` or `.purified`, and every `Perm` that's created for a
+space that's fixed, degreed or sliced. To share spaces, put an
+`InterningTable` on `PermSpace`:
+    
+    >>> PermSpace.interning_table = InterningTable()
+    >>> PermSpace('abc', n_elements=2) is PermSpace('abc', n_elements=2)
+    True
+
+Since a shared space keeps its cached properties, like `.unsliced`, getting
+derived spaces of an equal space again costs just a lookup.
+'''
+
+import collections
+import threading
+import weakref
+
+from combi._python_toolbox import nifty_collections
+from combi._python_toolbox import sequence_tools
+
+
+class InterningTable(object):
+    '''
+    Bounded table of shared `PermSpace` objects, by their arguments.
+    
+    The table holds spaces weakly, so a space is forgotten once nothing else
+    uses it. The `max_size` spaces that were used most recently are also held
+    strongly, so they'd be shared even if they're created again and again
+    without being kept. (Pass `max_size=None` to hold all spaces strongly.)
+    The table keeps count of its hits and misses.
+    
+    The table is thread-safe.
+    '''
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self.hits = 0
+        '''Number of lookups that found a space in the table.'''
+        self.misses = 0
+        '''Number of lookups that didn't find a space in the table.'''
+        self._perm_spaces = weakref.WeakValueDictionary()
+        self._recent_perm_spaces = nifty_collections.OrderedDict()
+        self.lock = threading.Lock()
+        '''Lock used while changing the table to make it thread-safe.'''
+    
+    def __len__(self):
+        return len(self._perm_spaces)
+    
+    def __contains__(self, key):
+        return key in self._perm_spaces
+    
+    def get(self, key, default=None):
+        '''Get the space for `key`, or `default` if it's not in the table.'''
+        with self.lock:
+            perm_space = self._perm_spaces.get(key)
+            if perm_space is None:
+                self.misses += 1
+                return default
+            self._hold(key, perm_space)
+            self.hits += 1
+            return perm_space
+    
+    def __setitem__(self, key, perm_space):
+        with self.lock:
+            self._perm_spaces[key] = perm_space
+            self._hold(key, perm_space)
+    
+    def _hold(self, key, perm_space):
+        '''Hold `perm_space` strongly as the most recently used space.'''
+        self._recent_perm_spaces[key] = perm_space
+        self._recent_perm_spaces.move_to_end(key)
+        if self.max_size is not None:
+            while len(self._recent_perm_spaces) > self.max_size:
+                self._recent_perm_spaces.popitem(last=False)
+    
+    def clear(self):
+        '''Remove all spaces and reset the hit and miss counts.'''
+        with self.lock:
+            self._perm_spaces.clear()
+            self._recent_perm_spaces.clear()
+            self.hits = self.misses = 0
+    
+    def get_stats(self):
+        '''Get a dict with the `hits`, `misses`, `size` and `max_size`.'''
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._perm_spaces), 'max_size': self.max_size}
+
+
+def _get_typed_item(item):
+    '''
+    Get a version of `item` that's equal only to items of the same type.
+    
+    Items like `1`, `1.0` and `True` are equal to each other, but they must
+    not give the same key.
+    '''
+    if isinstance(item, tuple):
+        return (type(item), tuple(map(_get_typed_item, item)))
+    else:
+        return (type(item), item)
+
+
+def _get_hashable_argument(argument):
+    '''
+    Get a hashable version of an argument of `PermSpace`.
+    
+    The type of every item is included. Raises `TypeError` if there isn't a
+    hashable version, like for an iterator, which we can't look at without
+    using it up.
+    '''
+    if isinstance(argument, collections.Iterator):
+        raise TypeError
+    elif isinstance(argument, (list, tuple)):
+        return (tuple, tuple(map(_get_typed_item, argument)))
+    elif isinstance(argument, dict):
+        return (dict, frozenset((_get_typed_item(key), _get_typed_item(value))
+                                for key, value in argument.items()))
+    elif isinstance(argument, (slice, sequence_tools.CuteRange)):
+        return (type(argument), _get_typed_item(argument.start),
+                _get_typed_item(argument.stop), _get_typed_item(argument.step))
+    else:
+        return _get_typed_item(argument)
+
+
+def get_interning_key(perm_space_type, args, kwargs):
+    '''
+    Get the key in an `InterningTable` for the arguments of a `PermSpace`.
+    
+    Returns `None` if the arguments can't be used as a key, like when they
+    include an iterator or an unhashable item.
+    '''
+    try:
+        key = (
+            perm_space_type, tuple(map(_get_hashable_argument, args)),
+            frozenset((name, _get_hashable_argument(value)) for name, value
+                                                             in kwargs.items())
+        )
+        hash(key)
+    except TypeError:
+        return None
+    return key
@@ -2,6 +2,7 @@
 # This program is distributed under the MIT license.
 
 import collections
+import operator
 
 from combi._python_toolbox import sequence_tools
 
@@ -66,6 +67,60 @@ class SelectionSpace(sequence_tools.CuteSequenceMixin,
                    zip(map(int, binary_i), self.sequence) if is_included)
         
         
+    def get_many(self, indices):
+        '''
+        Get the selections with the given index numbers.
+        
+        This is like `[selection_space[i] for i in indices]`, except the index
+        numbers are checked and converted to binary in one go.
+        '''
+        pattern = '{0:0%sb}' % self.sequence_length
+        selections = []
+        for i in indices:
+            i = operator.index(i)
+            if (-self.length <= i <= -1):
+                i += self.length
+            if not (0 <= i < self.length):
+                raise IndexError
+            selections.append(
+                set(item for (is_included, item) in
+                    zip(pattern.format(i), self.sequence) if
+                                                           is_included == '1')
+            )
+        return selections
+        
+        
+    def to_array(self, start=None, stop=None):
+        '''
+        Get the selections from `start` to `stop` as a boolean NumPy mask.
+        
+        The mask has a row for each selection that would be in
+        `tuple(selection_space)[start:stop]`, and a column for every item in
+        the sequence, saying whether the item is in the selection. This method
+        requires NumPy, though Combi itself doesn't.
+        '''
+        import numpy
+        canonical_slice = sequence_tools.CanonicalSlice(slice(start, stop),
+                                                        self.length)
+        n_selections = canonical_slice.stop - canonical_slice.start
+        if self.sequence_length <= 62:
+            numbers = numpy.arange(canonical_slice.start, canonical_slice.stop,
+                                   dtype=numpy.int64)
+            shifts = numpy.arange(self.sequence_length - 1, -1, -1,
+                                  dtype=numpy.int64)
+            return ((numbers[:, numpy.newaxis] >> shifts) & 1). \
+                                                                astype(bool)
+        else:
+            # Too big for NumPy integers, using Python integers:
+            pattern = '{0:0%sb}' % self.sequence_length
+            return numpy.fromiter(
+                (digit == '1' for i in range(canonical_slice.start,
+                                             canonical_slice.stop)
+                              for digit in pattern.format(i)),
+                dtype=bool, count=n_selections * self.sequence_length
+            ).reshape((n_selections, self.sequence_length))
+        
+        
     _reduced = property(lambda self: (type(self), self.sequence))
     __hash__ = lambda self: hash(self._reduced)
     __bool__ = lambda self: bool(self.length)
@@ -1,6 +1,8 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+from combi._python_toolbox import cute_testing
+from combi._python_toolbox import math_tools
 from combi.perming.calculating_length import * 
 
 def test_recurrent_perm_space_length():
@@ -13,4 +15,84 @@ def test_recurrent_comb_space_length():
     assert calculate_length_of_recurrent_comb_space(3, (3, 1, 1)) == 4
     assert calculate_length_of_recurrent_comb_space(2, (3, 2, 2, 1)) == 9
     assert calculate_length_of_recurrent_comb_space(3, (3, 2, 2, 1)) == 14
-    
\ No newline at end of file
+    
+    
+def test_length_engines():
+    for recurrences in ((1,), (2,), (1, 1, 1), (3, 1, 1), (3, 2, 2, 1),
+                        (4, 4, 1), (5,) * 3 + (2,) * 4, (1, 2, 3, 4, 5),
+                        (2,) * 30):
+        n_items = sum(recurrences)
+        for k in range(min(n_items + 2, 9)):
+            for calculate in (calculate_length_of_recurrent_perm_space,
+                              calculate_length_of_recurrent_comb_space):
+                assert calculate(k, recurrences, cache={},
+                                 engine='polynomial') == \
+                       calculate(k, recurrences, cache={}, engine='fbb')
+    for k in range(5, 10):
+        assert calculate_length_of_recurrent_perm_space(
+            k, (1,) * 10, cache={}
+        ) == math_tools.factorial(10, 11 - k)
+        assert calculate_length_of_recurrent_comb_space(
+            k, (1,) * 10, cache={}
+        ) == math_tools.binomial(10, k)
+    assert calculate_length_of_recurrent_perm_space(
+        40, (2,) * 20, cache={}
+    ) == math_tools.factorial(40) // 2 ** 20
+    assert calculate_length_of_recurrent_comb_space(
+        20, (3,) * 10, cache={}
+    ) == 44803
+    
+    with cute_testing.RaiseAssertor(ValueError):
+        calculate_length_of_recurrent_perm_space(3, (3, 1, 1),
+                                                 engine='recursive')
+    
+    
+def test_length_cache():
+    length_cache = LengthCache(max_size=5)
+    assert calculate_length_of_recurrent_perm_space(
+                    5, (3, 2, 2, 1), cache=length_cache, engine='fbb') == 440
+    stats = length_cache.get_stats()
+    assert stats['hits'] == 0
+    assert stats['size'] == stats['max_size'] == 5
+    for k, fbb in ((3, (3, 1, 1)), (2, (3, 2, 2, 1)), (3, (3, 2, 2, 1)),
+                   (6, (3, 3, 2, 2, 1)), (8, (3, 3, 2, 2, 1, 1))):
+        expected_length = calculate_length_of_recurrent_perm_space(
+                                                           k, fbb, cache={})
+        for _ in range(2):
+            assert calculate_length_of_recurrent_perm_space(
+                                k, fbb, cache=length_cache) == expected_length
+            assert len(length_cache) <= 5
+    assert length_cache.hits >= 5
+    assert length_cache.misses >= 5
+    
+    length_cache.clear()
+    assert length_cache.get_stats() == {'hits': 0, 'misses': 0, 'size': 0,
+                                        'max_size': 5}
+    length_cache[(1, 'a')] = 1
+    length_cache[(2, 'b')] = 2
+    length_cache.get((1, 'a'))
+    for i in range(3, 7):
+        length_cache[(i, 'c')] = i
+    assert (1, 'a') in length_cache
+    assert (2, 'b') not in length_cache
+    
+    
+def test_length_cache_persistence(tmpdir):
+    path = str(tmpdir.join('lengths.json'))
+    length_cache = LengthCache(max_size=None)
+    assert calculate_length_of_recurrent_comb_space(
+               6, (3, 3, 2, 2, 1), cache=length_cache, engine='fbb') == 53
+    length_cache.save(path)
+    
+    loaded_length_cache = LengthCache()
+    loaded_length_cache.load(path)
+    assert len(loaded_length_cache) == len(length_cache)
+    assert calculate_length_of_recurrent_comb_space(
+                      6, (3, 3, 2, 2, 1), cache=loaded_length_cache) == 53
+    assert loaded_length_cache.get_stats()['hits'] == 1
+    assert loaded_length_cache.get_stats()['misses'] == 0
+    
+    with open(path, 'w') as file:
+        file.write('[[2, 7]]')
+    with cute_testing.RaiseAssertor(ValueError):
+        LengthCache().load(path)
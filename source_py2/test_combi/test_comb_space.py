@@ -1,9 +1,12 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+import itertools
+
 from combi._python_toolbox import sequence_tools
 from combi._python_toolbox import math_tools
 from combi._python_toolbox import cute_testing
+from combi._python_toolbox import cute_iter_tools
 
 import combi
 from combi import *
@@ -79,3 +82,40 @@ def test_unrecurrented():
         assert unrecurrented_comb_space.index(comb) == i
         
         
+def test_big_comb_spaces():
+    for sequence_length in range(12):
+        for n_elements in range(sequence_length + 1):
+            comb_space = CombSpace(sequence_length, n_elements)
+            assert [tuple(comb) for comb in comb_space] == list(
+                itertools.combinations(range(sequence_length), n_elements)
+            )
+            
+    for comb_space in (CombSpace(300, 120), CombSpace(1000, 30),
+                       CombSpace(10000, 50)):
+        for i in (0, 1, 7 ** 20, comb_space.length // 3,
+                  comb_space.length - 1):
+            comb = comb_space[i]
+            assert cute_iter_tools.is_sorted(comb, strict=True)
+            assert comb_space.index(comb) == i
+        assert tuple(comb_space[0]) == \
+                                     tuple(range(comb_space.n_elements))
+        assert tuple(comb_space[-1]) == tuple(
+            range(comb_space.sequence_length - comb_space.n_elements,
+                  comb_space.sequence_length)
+        )
+        
+        
+def test_revolving_door():
+    comb_space = CombSpace('abcdef', 3)
+    combs = list(comb_space.iter_revolving_door())
+    assert sorted(combs) == list(comb_space)
+    assert all(isinstance(comb, Comb) for comb in combs)
+    for comb, next_comb in zip(combs, combs[1:]):
+        assert len(set(comb) ^ set(next_comb)) == 2
+    assert list(comb_space.iter_revolving_door(raw=True)) == \
+                                                [tuple(comb) for comb in combs]
+    
+    for perm_space in (PermSpace(4), CombSpace('aabc', 2),
+                       CombSpace(6, 2)[3:]):
+        with cute_testing.RaiseAssertor(TypeError):
+            perm_space.iter_revolving_door()
@@ -1,6 +1,9 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+import math
+import threading
+
 from combi._python_toolbox import cute_testing
 from combi._python_toolbox import math_tools
 
@@ -27,4 +30,89 @@ def test_things_in_root_namespace():
     combi.Bag
     combi.OrderedBag
     combi.FrozenBag
-    combi.FrozenOrderedBag
\ No newline at end of file
+    combi.FrozenOrderedBag
+    
+    
+def test_stirling_table():
+    stirling_table = math_tools.StirlingTable()
+    assert stirling_table.max_n == 0
+    assert stirling_table.row(0) == (1,)
+    assert stirling_table.row(4) == (0, 6, 11, 6, 1)
+    assert stirling_table.max_n == 4
+    assert stirling_table.get(4, 2) == 11
+    assert stirling_table.get(4, 5) == stirling_table.get(4, -1) == 0
+    assert math_tools.stirling(4, 2) == 11
+    assert math_tools.stirling(4, 3) == -6
+    assert math_tools.abs_stirling(4, 3) == 6
+    
+    stirling_table.precompute(30)
+    assert stirling_table.max_n == 30
+    for n in range(1, 31):
+        row = stirling_table.row(n)
+        assert len(row) == n + 1
+        assert sum(row) == math_tools.factorial(n)
+        
+    
+def test_stirling_table_threads():
+    stirling_table = math_tools.StirlingTable()
+    rows = {}
+    def get_rows(i):
+        rows[i] = [stirling_table.row(n) for n in range(100, 0, -1 - i)]
+    threads = [threading.Thread(target=get_rows, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stirling_table.max_n == 100
+    for i, thread_rows in rows.items():
+        assert thread_rows == [math_tools.stirling_table.row(n) for n in
+                                                      range(100, 0, -1 - i)]
+        
+        
+def test_stirling_table_persistence(tmpdir):
+    path = str(tmpdir.join('stirling.json'))
+    stirling_table = math_tools.StirlingTable()
+    stirling_table.precompute(40)
+    stirling_table.save(path)
+    
+    loaded_stirling_table = math_tools.StirlingTable()
+    loaded_stirling_table.load(path)
+    assert loaded_stirling_table.max_n == 40
+    assert loaded_stirling_table.row(40) == stirling_table.row(40)
+    assert loaded_stirling_table.row(41) == math_tools.stirling_table.row(41)
+    
+    with open(path, 'w') as file:
+        file.write('[[1], [0, 7]]')
+    with cute_testing.RaiseAssertor(ValueError):
+        math_tools.StirlingTable().load(path)
+        
+        
+def test_binomial():
+    for big in range(-3, 150, 7):
+        for small in range(-2, big + 3):
+            if small < 0 and small != big:
+                if big > small:
+                    with cute_testing.RaiseAssertor(ValueError):
+                        math_tools.binomial(big, small)
+                continue
+            expected = 1 if big == small else 0 if big < small else \
+                         math_tools.factorial(big) // math_tools.factorial(
+                                 big - small) // math_tools.factorial(small)
+            assert math_tools.binomial(big, small) == expected
+    assert math_tools.binomial(1000, 3) == 1000 * 999 * 998 // 6
+    assert math_tools.binomial(1000, 500) == \
+                      math.factorial(1000) // math.factorial(500) ** 2
+    assert math_tools.binomial(1000, 997) == math_tools.binomial(1000, 3)
+    
+    
+def test_factorial():
+    for x in range(60):
+        assert math_tools.factorial(x) == math.factorial(x)
+        for start in range(1, x + 3):
+            assert math_tools.factorial(x, start) == \
+                        math.factorial(x) // math.factorial(min(start - 1, x))
+    assert math_tools.factorial(5, 0) == 0
+    assert math_tools.factorial(10000, 9990) == \
+                         math.factorial(10000) // math.factorial(9989)
+    assert math_tools.factorial(3000, 1000) == \
+                          math.factorial(3000) // math.factorial(999)
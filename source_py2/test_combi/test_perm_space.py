@@ -2,9 +2,14 @@
 # This program is distributed under the MIT license.
 
 import pickle
+import random
+import gc
+import collections
 import itertools
 import math
 
+import pytest
+
 from combi._python_toolbox.third_party import functools
 
 from combi._python_toolbox import cute_testing
@@ -13,6 +18,7 @@ from combi._python_toolbox import cute_iter_tools
 from combi._python_toolbox import nifty_collections
 from combi._python_toolbox import caching
 from combi._python_toolbox import sequence_tools
+from combi._python_toolbox import misc_tools
 
 import combi
 from combi import *
@@ -534,6 +540,60 @@ def test_neighbors():
                                         len(perm.get_neighbors(degrees=(0, 1)))
     
     
+def test_iterate_neighbors():
+    perm = Perm('wome', 'meow')
+    neighbors = perm.iterate_neighbors(degrees=(1, 2))
+    assert not isinstance(neighbors, collections.Sequence)
+    neighbors = list(neighbors)
+    assert set(neighbors) == set(perm.get_neighbors(degrees=(1, 2)))
+    assert len(neighbors) == len(set(neighbors)) == 6 + 11
+    assert all(isinstance(neighbor, Perm) for neighbor in neighbors)
+    assert list(perm.iterate_neighbors(degrees=(1, 2), raw=True)) == \
+                                    [tuple(neighbor) for neighbor in neighbors]
+    
+    random.seed(0)
+    shuffled_neighbors = list(perm.iterate_neighbors(degrees=(1, 2),
+                                                     shuffle=True))
+    assert shuffled_neighbors != neighbors
+    assert sorted(shuffled_neighbors) == sorted(neighbors)
+    
+    batches = list(perm.iterate_neighbors(degrees=(1, 2), batch_size=5))
+    assert [len(batch) for batch in batches] == [5, 5, 5, 2]
+    assert sum(batches, []) == neighbors
+    with cute_testing.RaiseAssertor(ValueError):
+        perm.iterate_neighbors(batch_size=0)
+    with cute_testing.RaiseAssertor(TypeError):
+        perm.iterate_neighbors((1, 2))
+        
+    # Neighbors are checked against the fixed map, degrees and slice of the
+    # space:
+    perm_space = PermSpace(6, fixed_map={1: 1}, degrees=(1, 3))
+    perm = perm_space[8]
+    assert perm.degree == 3
+    neighbors = tuple(perm.iterate_neighbors(degrees=(1, 2),
+                                             perm_space=perm_space))
+    assert neighbors
+    for neighbor in neighbors:
+        assert neighbor in perm_space
+        assert neighbor[1] == 1
+        assert neighbor.degree in (1, 3)
+    assert set(neighbors) == set(
+        neighbor for neighbor in
+        perm.iterate_neighbors(degrees=(1, 2),
+                               perm_space=perm_space.undegreed)
+        if neighbor[1] == 1 and neighbor.degree in (1, 3)
+    )
+    sliced_perm_space = PermSpace(6)[100:200]
+    perm = sliced_perm_space[50]
+    neighbors = tuple(perm.iterate_neighbors(perm_space=sliced_perm_space))
+    assert 0 < len(neighbors) < 15
+    for neighbor in neighbors:
+        assert 100 <= PermSpace(6).index(neighbor) < 200
+        
+    with cute_testing.RaiseAssertor(NotImplementedError):
+        PermSpace(5, n_elements=3)[10].iterate_neighbors()
+        
+    
 def test_recurrent():
     recurrent_perm_space = PermSpace('abbccddd', n_elements=3)
     assert recurrent_perm_space.is_recurrent
@@ -749,4 +809,528 @@ def test_variations_make_unequal():
     
     
     
-    
\ No newline at end of file
+        
+    
+def test_iterating():
+    perm_spaces = (
+        PermSpace(5), PermSpace(6, n_elements=3), PermSpace(4, n_elements=0),
+        PermSpace('meowx'), PermSpace('meowx', n_elements=2),
+        PermSpace(5, domain='abcde'), PermSpace(5, n_elements=3, domain='abc'),
+        PermSpace(6, fixed_map={0: 3, 4: 4}),
+        PermSpace('abcdef', fixed_map={1: 'c'}, n_elements=4),
+        PermSpace(6)[17:500], PermSpace('growls', n_elements=3)[5:-7],
+        PermSpace(6, fixed_map={0: 3})[3:9], PermSpace(6, degrees=(1, 3)),
+        PermSpace(6, degrees=(0, 2, 4), fixed_map={1: 2, 3: 3}),
+        PermSpace('isogram', domain='travels', degrees=(1, 3),
+                  fixed_map={'t': 'i', 'v': 'g'})[2:-2],
+        PermSpace('abracab', n_elements=3), PermSpace('aabbbc'),
+        PermSpace('aabbcc', fixed_map={1: 'b', 4: 'a'}),
+        PermSpace('aabbbc', n_elements=4, fixed_map={2: 'c'}),
+        PermSpace('abcabc', domain='uvwxyz')[3:40], CombSpace(7, 3),
+        CombSpace('abcdefg', 4)[2:20], CombSpace('abracab', 3),
+        CombSpace('abcabc', 3), CombSpace('mississippi', 4)[1:-1],
+    )
+    for perm_space in perm_spaces:
+        perms = list(perm_space)
+        assert len(perms) == perm_space.length
+        for i, perm in enumerate(perms):
+            assert perm == perm_space[i]
+            assert type(perm) == type(perm_space[i])
+        assert list(itertools.islice(perm_space, 3)) == list(perm_space[:3])
+        assert list(perm_space.iter_raw()) == [tuple(perm) for perm in perms]
+        
+        
+def test_get_many():
+    perm_spaces = (
+        PermSpace(7), PermSpace('meowxyz', n_elements=4),
+        PermSpace(7, domain='abcdefg', fixed_map={'c': 2})[5:-5],
+        PermSpace(7, degrees=(2, 3)), PermSpace('aabbbcc'),
+        CombSpace(12, 4), CombSpace('abracadabra', 4)
+    )
+    for perm_space in perm_spaces:
+        indices = list(range(0, perm_space.length, 7)) + \
+                  list(range(perm_space.length - 1, 0, -300)) + [0, 1, 1, -2]
+        assert perm_space.get_many(indices) == \
+                                          [perm_space[i] for i in indices]
+        assert perm_space.get_many(indices, raw=True) == \
+                                   [tuple(perm_space[i]) for i in indices]
+        assert perm_space.get_many([]) == []
+        with cute_testing.RaiseAssertor(IndexError):
+            perm_space.get_many([0, perm_space.length])
+        with cute_testing.RaiseAssertor(IndexError):
+            perm_space.get_many([-perm_space.length - 1])
+        with cute_testing.RaiseAssertor(TypeError):
+            perm_space.get_many([1.0])
+        
+        
+def test_index_many():
+    perm_spaces = (
+        PermSpace(7), PermSpace('meowxyz', n_elements=4),
+        PermSpace(7, domain='abcdefg', fixed_map={'c': 2})[5:-5],
+        PermSpace(7, degrees=(2, 3)), PermSpace('aabbbcc'),
+        PermSpace('meowxyz', domain='abcdefg', degrees=(1, 4),
+                  fixed_map={'b': 'm'})[3:],
+        PermSpace('aabbbcc', n_elements=3, fixed_map={1: 'c'}),
+        CombSpace(12, 4)[10:], CombSpace('abracadabra', 4)
+    )
+    for perm_space in perm_spaces:
+        indices = list(range(0, perm_space.length, 7))
+        perms = perm_space.get_many(indices)
+        assert perm_space.index_many(perms) == indices
+        assert perm_space.index_many(map(tuple, perms)) == indices
+        assert perm_space.index_many([list(perm) for perm in perms]) == \
+                                                                        indices
+        assert perm_space.index_many([]) == []
+        with cute_testing.RaiseAssertor(ValueError):
+            perm_space.index_many([perms[0], ('foo',) * perm_space.n_elements])
+            
+    perm_space = PermSpace(5)
+    with cute_testing.RaiseAssertor(ValueError):
+        perm_space.index_many([(0, 1, 2, 3, 3)])
+    with cute_testing.RaiseAssertor(ValueError):
+        perm_space.index_many([(0, 1, 2, 3)])
+    with cute_testing.RaiseAssertor(ValueError):
+        perm_space[10:].index_many([(0, 1, 2, 3, 4)])
+    with cute_testing.RaiseAssertor(ValueError):
+        CombSpace(5, 2).index_many([(3, 1)])
+        
+        
+def test_cycles():
+    perm = PermSpace(5)[10]
+    assert perm.cycles == ((0,), (1, 2, 4, 3))
+    assert perm.cycle_type == (4, 1)
+    assert perm.order == 4
+    assert perm.n_cycles == 2
+    assert perm.degree == 3
+    assert PermSpace(5)[0].cycles == ((0,), (1,), (2,), (3,), (4,))
+    assert PermSpace(5)[0].order == 1
+    
+    perm = Perm((1, 0, 3, 4, 2, 6, 7, 8, 9, 5))
+    assert perm.cycle_type == (5, 3, 2)
+    assert perm.order == 30
+    identity = PermSpace(10)[0]
+    assert perm ** 30 == perm ** 0 == perm ** (- 30) == identity
+    assert all(perm ** i != identity for i in range(1, 30))
+    for exponent in (2, 3, 7, 29, 31, 10 ** 20 + 7):
+        assert perm ** exponent == \
+                           misc_tools.general_product((perm,) * (exponent % 30))
+        assert perm ** (- exponent) == ~(perm ** exponent)
+        
+    for perm in PermSpace(6).get_many(range(0, 720, 37)):
+        items = set()
+        for cycle in perm.cycles:
+            assert cycle[0] == min(cycle)
+            for item, next_item in zip(cycle, cycle[1:] + cycle[:1]):
+                assert perm[item] == next_item
+            items.update(cycle)
+        assert items == set(range(6))
+        assert sum(perm.cycle_type) == 6
+        assert perm ** perm.order == PermSpace(6)[0]
+        assert perm ** 5 == perm * perm * perm * perm * perm
+        
+    perm = PermSpace('abcde', domain='vwxyz')[10]
+    assert perm.cycles == perm.unrapplied.undapplied.cycles == \
+                                                      PermSpace(5)[10].cycles
+    assert perm.n_cycles == 2
+    assert perm.order == 4
+    with cute_testing.RaiseAssertor(TypeError):
+        PermSpace(5, n_elements=3)[10].cycles
+    
+        
+def test_compose_all():
+    perm_space = PermSpace(7)
+    perms = perm_space.get_many((5, 1000, 2345, 17, 4999, 3, 777))
+    for n_perms in (1, 2, 3, 7):
+        some_perms = perms[:n_perms]
+        expected_perm = misc_tools.general_product(some_perms)
+        assert Perm.compose_all(some_perms) == expected_perm
+        assert Perm.compose_all(iter(some_perms)) == expected_perm
+        assert Perm.compose_all(some_perms, map_function=map) == expected_perm
+    assert Perm.compose_all((perms[1],) * 12) == perms[1] ** 12
+    
+    class MyPerm(Perm): pass
+    typed_perm_space = perm_space.get_typed(MyPerm)
+    typed_perms = typed_perm_space.get_many((5, 1000, 2345))
+    composed_perm = Perm.compose_all(typed_perms)
+    assert type(composed_perm) is MyPerm
+    assert tuple(composed_perm) == \
+                                tuple(Perm.compose_all(perm_space.get_many(
+                                    (5, 1000, 2345))))
+    
+    with cute_testing.RaiseAssertor(ValueError):
+        Perm.compose_all(())
+    with cute_testing.RaiseAssertor(ValueError):
+        Perm.compose_all((perms[0], PermSpace(8)[5]))
+    with cute_testing.RaiseAssertor(ValueError):
+        Perm.compose_all((perms[0], tuple(perms[1])))
+    for other_perm_space in (PermSpace('abcdefg'),
+                             PermSpace(7, domain='ABCDEFG'),
+                             PermSpace(7, n_elements=3)):
+        with cute_testing.RaiseAssertor(TypeError):
+            Perm.compose_all((other_perm_space[3], other_perm_space[5]))
+            
+            
+def test_compose_all_with_numpy():
+    pytest.importorskip('numpy')
+    perm_space = PermSpace(7)
+    perms = perm_space.get_many((5, 1000, 2345, 17, 4999, 3, 777))
+    assert Perm.compose_all(perms, use_numpy=True) == \
+                                           misc_tools.general_product(perms)
+    assert Perm.compose_all(perms[:1], use_numpy=True) == perms[0]
+    
+    perm_space = PermSpace(3000)
+    perms = [perm_space[i * 10 ** 1000] for i in range(1, 5)]
+    assert Perm.compose_all(perms, use_numpy=True) == \
+                          Perm.compose_all(perms) == \
+                                             misc_tools.general_product(perms)
+    
+        
+def test_big_perm_spaces():
+    for perm_space in (PermSpace(60), PermSpace(60, n_elements=20),
+                       PermSpace(tuple(range(100, 40, -1)), n_elements=59)):
+        for i in (0, 1, 7 ** 30, perm_space.length // 3,
+                  perm_space.length - 1):
+            factoradic_number = math_tools.to_factoradic(
+                i * math.factorial(perm_space.n_unused_elements),
+                n_digits_pad=perm_space.sequence_length
+            )[:perm_space.n_elements]
+            unused_values = list(perm_space.sequence)
+            perm = perm_space[i]
+            assert tuple(perm) == tuple(
+                unused_values.pop(digit) for digit in factoradic_number
+            )
+            assert perm_space.index(perm) == i
+            assert perm_space.index(tuple(perm)) == i
+        with cute_testing.RaiseAssertor(ValueError):
+            perm_space.index(
+                (perm_space.sequence[0],) * perm_space.n_elements
+            )
+        assert pickle.loads(pickle.dumps(perm_space)) == perm_space
+        
+        
+def test_big_degreed_perm_spaces():
+    for perm_space in (PermSpace(50, degrees=(10, 20)),
+                       PermSpace(50, degrees=47, fixed_map={0: 1, 1: 0}),
+                       PermSpace(tuple(range(100, 50, -1)), degrees=(1, 2, 3))):
+        for i in (0, 1, perm_space.length // 3, perm_space.length // 2 + 1,
+                  perm_space.length - 1):
+            perm = perm_space[i]
+            assert perm.degree in perm_space.degrees
+            assert perm_space.index(perm) == i
+            assert perm_space.index(tuple(perm)) == i
+            assert perm_space.index_many((perm, tuple(perm))) == [i, i]
+        identity_perm = perm_space.undegreed.unfixed[0]
+        with cute_testing.RaiseAssertor(ValueError):
+            perm_space.index(identity_perm)
+        with cute_testing.RaiseAssertor(ValueError):
+            perm_space.index_many([tuple(identity_perm)])
+        
+        
+def test_perm_slots():
+    perm_space = PermSpace('meow', domain='abcd', n_elements=3)
+    perm = perm_space[7]
+    # (On Python 2 `collections.Sequence` doesn't have `__slots__`, so perms
+    # get a `__dict__` from it, but nothing is put in it.)
+    assert not perm.__dict__
+    assert not PermSpace('abca').unrecurrented[0].__dict__
+    assert not CombSpace('abcd', 2)[0].__dict__
+    with cute_testing.RaiseAssertor(AttributeError):
+        perm.is_rapplied = False
+    assert perm.is_rapplied and perm.is_dapplied and perm.is_partial
+    assert not perm.is_recurrent and not perm.is_combination
+    assert not perm.is_pure
+    assert perm._cached_values is None
+    assert perm.uncombinationed is perm
+    assert perm._cached_values == {}
+    assert perm.undapplied is perm.undapplied
+    assert perm.undapplied.undapplied is perm.undapplied
+    assert pickle.loads(pickle.dumps(perm)) == perm
+    assert pickle.loads(pickle.dumps(perm.undapplied)) == perm.undapplied
+    
+    comb = CombSpace(5, 3)[4]
+    assert not hasattr(comb, '__dict__') or not comb.__dict__
+    assert comb.is_combination and not comb.is_pure
+    assert comb.uncombinationed == Perm(comb, PermSpace(5, n_elements=3))
+    assert pickle.loads(pickle.dumps(comb)) == comb
+    
+    unrecurrented_perm = PermSpace('abca').unrecurrented[5]
+    assert not hasattr(unrecurrented_perm, '__dict__') or \
+                                              not unrecurrented_perm.__dict__
+    assert pickle.loads(pickle.dumps(unrecurrented_perm)) == \
+                                                             unrecurrented_perm
+    
+        
+def test_lazy_construction():
+    # The length of a big space isn't calculated until it's needed:
+    big_perm_space = PermSpace(10 ** 5)
+    assert 'length' not in vars(big_perm_space)
+    assert not big_perm_space.is_sliced
+    perm_space = PermSpace(5)
+    assert 'length' not in vars(perm_space)
+    assert perm_space.length == len(perm_space) == 120
+    assert perm_space[1:4].length == 3 and perm_space[1:4].is_sliced
+    assert perm_space.canonical_slice == \
+                                   sequence_tools.CanonicalSlice(slice(0, 120))
+    
+    recurrent_perm_space = PermSpace('abca')
+    assert 'is_recurrent' not in vars(recurrent_perm_space)
+    assert recurrent_perm_space.is_recurrent
+    assert not PermSpace('abc').is_recurrent
+    assert PermSpace('abc').unrecurrented == PermSpace('abc')
+    
+    assert PermSpace('abcd', fixed_map={0: 'b', 1: 'z', 7: 'a',
+                                        2: [1]}).fixed_map == {0: 'b'}
+    assert PermSpace(3, domain='xyz',
+                     fixed_map={'x': 2, 'w': 1, 'y': 3}).fixed_map == {'x': 2}
+    assert PermSpace(3, fixed_map={0: 2, 1.5: 1, 4: 0}).fixed_map == {0: 2}
+    assert not PermSpace(3, domain=(0, 1, 2)).is_dapplied
+    assert not PermSpace(3, domain=sequence_tools.CuteRange(3)).is_dapplied
+    assert PermSpace(3, domain=(0, 2, 1)).is_dapplied
+    assert not PermSpace(tuple(range(4))).is_rapplied
+    assert PermSpace((0, 1, 3)).is_rapplied
+    assert not PermSpace(4, degrees=range(4)).is_degreed
+    assert not PermSpace(4, degrees=sequence_tools.CuteRange(4)).is_degreed
+    assert PermSpace(4, degrees=range(3)).is_degreed
+    
+        
+def test_sequence_and_domain_indexes():
+    perm_space = PermSpace('abcab', domain='vwxyz')
+    assert perm_space._positions_of_sequence_items == \
+                                     {'a': (0, 3), 'b': (1, 4), 'c': (2,)}
+    assert perm_space._indices_of_domain_items == \
+                                    {'v': 0, 'w': 1, 'x': 2, 'y': 3, 'z': 4}
+    perm = Perm('bacba', perm_space)
+    assert tuple(perm.unrapplied) == (1, 0, 2, 4, 3)
+    assert perm['x'] == 'c' and perm['z'] == 'a'
+    for perm in perm_space:
+        assert tuple(perm_space.sequence[i] for i in perm.unrapplied) == \
+                                                                    tuple(perm)
+        assert [perm[key] for key in perm_space.domain] == list(perm)
+    
+    fixed_perm_space = PermSpace('abcab', domain='vwxyz',
+                                 fixed_map={'w': 'c', 'y': 'a'})
+    assert fixed_perm_space._undapplied_unrapplied_fixed_map == {1: 2, 3: 0}
+    assert sorted(fixed_perm_space.fixed_indices) == [1, 3]
+    assert fixed_perm_space.unrapplied.fixed_map == {'w': 2, 'y': 0}
+    
+        
+def test_to_array():
+    numpy = pytest.importorskip('numpy')
+    perm_space = PermSpace(4)
+    array = perm_space.to_array()
+    assert array.shape == (24, 4)
+    assert [tuple(row) for row in array] == \
+                                           [tuple(perm) for perm in perm_space]
+    assert (perm_space.to_array(3, -5) == array[3:-5]).all()
+    assert perm_space.to_array(7, 3).shape == (0, 4)
+    
+    perm_space = PermSpace('meow', domain='abcd', n_elements=3)[4:]
+    array = perm_space.to_array()
+    assert [tuple('meow'[i] for i in row) for row in array] == \
+                                           [tuple(perm) for perm in perm_space]
+    
+    perm_space = PermSpace('aabc', fixed_map={3: 'a'})
+    array = perm_space.to_array()
+    assert [tuple('aabc'[i] for i in row) for row in array] == \
+                                           [tuple(perm) for perm in perm_space]
+    assert all(sorted(row) == [0, 1, 2, 3] for row in array)
+    
+    assert PermSpace(3, n_elements=0).to_array().shape == (1, 0)
+    
+    comb_space = CombSpace('aabbc', 3)
+    mask = comb_space.to_array()
+    assert mask.dtype == bool
+    assert mask.shape == (comb_space.length, 5)
+    assert [tuple(numpy.array(list('aabbc'))[row]) for row in mask] == \
+                                           [tuple(comb) for comb in comb_space]
+    
+    
+def test_sample():
+    class BrandNewPerm(Perm):
+        pass
+    perm_spaces = (
+        PermSpace(4), PermSpace(5, n_elements=3), PermSpace('aabc'),
+        PermSpace('aabbc', n_elements=3), PermSpace(5, degrees=(1, 3)),
+        PermSpace('abcd', domain='wxyz', degrees=2),
+        PermSpace(5, fixed_map={1: 3}, n_elements=4), CombSpace(6, 3),
+        CombSpace('aabbc', 3), PermSpace(5, fixed_map={0: 1}, degrees=2),
+        PermSpace(5)[10:50], PermSpace(4, perm_type=BrandNewPerm),
+    )
+    rng = random.Random(0)
+    for perm_space in perm_spaces:
+        n_samples = 150 * perm_space.length
+        perms = perm_space.sample(n_samples, rng=rng)
+        assert len(perms) == n_samples
+        assert all(type(perm) is perm_space.perm_type for perm in perms)
+        # Every perm should be about equally likely:
+        counts = collections.Counter(perm_space.index_many(perms))
+        assert len(counts) == perm_space.length
+        assert all(50 <= count <= 250 for count in counts.values())
+        
+        raw_perms = perm_space.sample(10, rng=7, raw=True)
+        assert raw_perms == perm_space.sample(10, rng=7, raw=True) == \
+                [tuple(perm) for perm in perm_space.sample(10, rng=7)]
+        
+        half_length = perm_space.length // 2
+        perms = perm_space.sample(half_length, replace=False, rng=rng)
+        assert len(set(perms)) == half_length
+        assert sorted(perm_space.index_many(
+            perm_space.sample(perm_space.length, replace=False, rng=rng)
+        )) == list(range(perm_space.length))
+        with cute_testing.RaiseAssertor(ValueError):
+            perm_space.sample(perm_space.length + 1, replace=False)
+        
+        assert perm_space.take_random() in perm_space
+        
+    assert PermSpace(3).sample(0) == []
+    with cute_testing.RaiseAssertor(ValueError):
+        PermSpace(3).sample(-1)
+    with cute_testing.RaiseAssertor(ValueError):
+        PermSpace(3, n_elements=4).sample(1)
+        
+    perm_space = PermSpace(1000, degrees=(5, 7))
+    for perm in perm_space.sample(5, rng=rng):
+        assert perm.degree in (5, 7)
+    perm_space = PermSpace('ab' * 500, n_elements=600)
+    for perm in perm_space.sample(3, rng=rng, raw=True):
+        assert len(perm) == 600
+        assert 100 <= perm.count('a') <= 500
+    
+    
+def _get_weighted_sum(perm):
+    return sum(i * value for i, value in enumerate(perm))
+
+
+def _is_increasing_at_ends(perm):
+    return perm[0] < perm[-1]
+    
+    
+def test_parallel_map():
+    for perm_space in (PermSpace(5), PermSpace(6, n_elements=3),
+                       PermSpace(5, degrees=(1, 3))[3:40],
+                       PermSpace(5, fixed_map={1: 2}), CombSpace(7, 3),
+                       PermSpace((0, 0, 1, 2, 3), n_elements=4)):
+        assert list(perm_space.parallel_map(
+            _get_weighted_sum, n_workers=2, chunk_size=7
+        )) == [_get_weighted_sum(perm) for perm in perm_space]
+        assert sorted(perm_space.parallel_map(
+            _get_weighted_sum, n_workers=2, chunk_size=3, ordered=False
+        )) == sorted(_get_weighted_sum(perm) for perm in perm_space)
+        
+        perms = list(perm_space.parallel_filter(_is_increasing_at_ends,
+                                                n_workers=2))
+        assert perms == [perm for perm in perm_space if
+                         _is_increasing_at_ends(perm)]
+        assert all(type(perm) is perm_space.perm_type for perm in perms)
+        assert sorted(perm_space.parallel_filter(
+            _is_increasing_at_ends, n_workers=1, chunk_size=2, ordered=False,
+            raw=True
+        )) == sorted(tuple(perm) for perm in perms)
+        
+    perm_sums = PermSpace(10 ** 4).parallel_map(sum, n_workers=2,
+                                                chunk_size=2)
+    assert list(itertools.islice(perm_sums, 5)) == [sum(range(10 ** 4))] * 5
+    perm_sums.close()
+    
+    with cute_testing.RaiseAssertor(ValueError):
+        PermSpace(3).parallel_map(sum, chunk_size=0)
+    with cute_testing.RaiseAssertor(ValueError):
+        PermSpace(3).parallel_filter(sum, n_workers=0)
+    
+    
+def test_compact_pickling():
+    perm_spaces = (
+        PermSpace(100), PermSpace('abcde' * 20, n_elements=10),
+        PermSpace(7, domain='abcdefg', fixed_map={'a': 3},
+                  degrees=(2, 3))[5:20],
+        CombSpace(300, 3), CombSpace(70000, 2),
+        PermSpace('abca').unrecurrented,
+    )
+    for perm_space in perm_spaces:
+        perms = [perm_space[0], perm_space[-1]]
+        new_perm_space, new_perms = \
+                              pickle.loads(pickle.dumps((perm_space, perms)))
+        assert new_perm_space == perm_space
+        assert new_perms == perms
+        assert [type(new_perm) for new_perm in new_perms] == \
+                                               [type(perm) for perm in perms]
+        
+    # Neither the space nor the perm drag along the cached spaces:
+    perm_space = PermSpace(100)
+    perm_space.unsliced.undegreed.unfixed.purified
+    assert len(pickle.dumps(perm_space, 2)) < 200
+    assert len(pickle.dumps(perm_space[-1], 2)) < 400
+    
+    # Perms of the same space that are pickled together share their space:
+    perm_space = PermSpace('abcd' * 3, n_elements=5)
+    first_perm, second_perm = pickle.loads(
+        pickle.dumps([perm_space[0], perm_space[7]])
+    )
+    assert first_perm.nominal_perm_space is second_perm.nominal_perm_space
+    assert first_perm.nominal_perm_space == perm_space
+    
+    # Items that are equal but of different types aren't mixed up:
+    first_perm = pickle.loads(pickle.dumps(PermSpace(('x', 1, 2))[1]))
+    second_perm = pickle.loads(pickle.dumps(PermSpace(('x', True, 2))[1]))
+    assert tuple(first_perm) == ('x', 2, 1)
+    assert tuple(second_perm) == ('x', 2, True)
+    assert type(second_perm[2]) is bool
+    
+    # A domain with keys that can't be compared with each other:
+    perm_space = PermSpace(3, domain=('a', 1, None), fixed_map={'a': 0, 1: 1})
+    new_perm_space = pickle.loads(pickle.dumps(perm_space))
+    assert new_perm_space.domain == perm_space.domain
+    assert new_perm_space.fixed_map == perm_space.fixed_map
+    new_perm = pickle.loads(pickle.dumps(perm_space[0]))
+    assert tuple(new_perm) == tuple(perm_space[0])
+
+    
+def test_pickling_perms_one_at_a_time():
+    perm_space = PermSpace(tuple('item%d' % i for i in range(2000)),
+                           n_elements=3)
+    perms = [perm_space[i] for i in (0, 7, 10 ** 6)]
+    perm_sequences = [tuple(perm) for perm in perms]
+    
+    # Every perm carries its space, but the unpickled perms share one space:
+    perm_pickles = [pickle.dumps(perm, protocol=2) for perm in perms]
+    assert all(len(perm_pickle) > 10000 for perm_pickle in perm_pickles)
+    new_perms = [pickle.loads(perm_pickle) for perm_pickle in perm_pickles]
+    assert new_perms == perms
+    new_perm_space = new_perms[0].nominal_perm_space
+    assert all(new_perm.nominal_perm_space is new_perm_space for new_perm in
+                                                                    new_perms)
+    
+    # Once the space is registered, its perms refer to it by digest:
+    assert not perm_space.is_registered_for_pickling
+    perm_space.register_for_pickling()
+    try:
+        assert perm_space.is_registered_for_pickling
+        perm_space_pickle = pickle.dumps(perm_space, protocol=2)
+        perm_pickles = [pickle.dumps(perm, protocol=2) for perm in perms]
+        assert all(len(perm_pickle) < 200 for perm_pickle in perm_pickles)
+        new_perms = [pickle.loads(perm_pickle) for perm_pickle in
+                                                                  perm_pickles]
+        assert new_perms == perms
+        assert all(new_perm.nominal_perm_space is perm_space for new_perm in
+                                                                     new_perms)
+    finally:
+        perm_space.unregister_for_pickling()
+    assert not perm_space.is_registered_for_pickling
+    
+    # A process that doesn't know the space can't unpickle its perms until
+    # it unpickles the space, which registers it there too:
+    # (On Python 2 list comprehensions leak `perm`, so we reset it too.)
+    perm_space = perms = perm = new_perms = new_perm_space = None
+    gc.collect()
+    with cute_testing.RaiseAssertor(LookupError):
+        pickle.loads(perm_pickles[0])
+    new_perm_space = pickle.loads(perm_space_pickle)
+    try:
+        assert new_perm_space.is_registered_for_pickling
+        new_perms = [pickle.loads(perm_pickle) for perm_pickle in
+                                                                  perm_pickles]
+        assert [tuple(new_perm) for new_perm in new_perms] == perm_sequences
+        assert all(new_perm.nominal_perm_space is new_perm_space for new_perm
+                                                                  in new_perms)
+    finally:
+        new_perm_space.unregister_for_pickling()
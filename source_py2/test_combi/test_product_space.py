@@ -1,6 +1,8 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+import pytest
+
 from combi._python_toolbox import cute_testing
 from combi._python_toolbox import sequence_tools
 
@@ -81,4 +83,33 @@ def test():
                (sequence_tools.CuteRange(3),
                 sequence_tools.CuteRange(4))
            )
-    
\ No newline at end of file
+    
+    
+def test_get_many():
+    product_space = ProductSpace(('abc', range(4), PermSpace(3)))
+    indices = (0, 5, 71, -1, 5, 30)
+    assert product_space.get_many(indices) == \
+                                         [product_space[i] for i in indices]
+    assert product_space.get_many(()) == []
+    with cute_testing.RaiseAssertor(IndexError):
+        product_space.get_many((3, product_space.length))
+    
+    
+def test_to_array():
+    pytest.importorskip('numpy')
+    product_space = ProductSpace(('abc', range(4), 'xy'))
+    array = product_space.to_array()
+    assert array.shape == (24, 3)
+    assert [
+        tuple(sequence[i] for sequence, i in zip(product_space.sequences, row))
+                                                               for row in array
+    ] == list(product_space)
+    assert (product_space.to_array(5, -2) == array[5:-2]).all()
+    
+    huge_perm_space = PermSpace(25)
+    huge_product_space = ProductSpace((huge_perm_space, range(3)))
+    array = huge_product_space.to_array(-4)
+    assert [tuple(row) for row in array] == [
+        (huge_perm_space.length - 2, 2), (huge_perm_space.length - 1, 0),
+        (huge_perm_space.length - 1, 1), (huge_perm_space.length - 1, 2)
+    ]
@@ -25,8 +25,41 @@ def factorial(x, start=1):
         60
 
     '''
-    from combi._python_toolbox import misc_tools
-    return misc_tools.general_product(range(start, x+1), start=1)
+    if not (isinstance(x, numbers.Integral) and
+            isinstance(start, numbers.Integral) and start >= 1):
+        from combi._python_toolbox import misc_tools
+        return misc_tools.general_product(range(start, x+1), start=1)
+    if start > x:
+        return 1
+    n_factors = x - start + 1
+    if _math_perm is not None:
+        return _math_perm(x, n_factors)
+    if start - 1 <= n_factors:
+        # Most of the factors of `x!` are in the range, so it's fastest to let
+        # `math.factorial` do the work.
+        return math.factorial(x) // math.factorial(start - 1)
+    return _product_of_range(start, x + 1)
+
+
+_math_perm = getattr(math, 'perm', None)
+'''`math.perm` on Python versions that have it, otherwise `None`.'''
+
+
+def _product_of_range(start, stop):
+    '''
+    Get the product of the integers in `range(start, stop)`.
+    
+    The range is split in two recursively, so the multiplications are done on
+    numbers of about the same size, which is much faster for big numbers than
+    multiplying the factors one by one.
+    '''
+    if stop - start <= 8:
+        result = 1
+        for factor in range(start, stop):
+            result *= factor
+        return result
+    middle = (start + stop) // 2
+    return _product_of_range(start, middle) * _product_of_range(middle, stop)
 
 
 def inverse_factorial(number, round_up=True):
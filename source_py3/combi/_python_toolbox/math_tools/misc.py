@@ -127,16 +127,56 @@ def binomial(big, small):
     
     This is used in combinatorical calculations. More information:
     http://en.wikipedia.org/wiki/Binomial_coefficient
+    
+    Binomials with a `big` lower than `_n_pascal_rows` are taken from a cached
+    Pascal triangle. Others are calculated with `math.comb` on Python versions
+    that have it, or otherwise by multiplying and dividing the factors one by
+    one when `small` is small compared to `big`, and with factorials when it
+    isn't.
     '''
     if big == small:
         return 1
     if big < small:
         return 0
-    else:
-        return (math.factorial(big) // math.factorial(big - small)
+    if small < 0:
+        raise ValueError('`small` must not be negative.')
+    if big < _n_pascal_rows:
+        return _get_pascal_rows()[big][small]
+    if _math_comb is not None:
+        return _math_comb(big, small)
+    small = min(small, big - small)
+    if small <= 16 or 3 * small <= big:
+        result = 1
+        for i in range(1, small + 1):
+            result = result * (big - small + i) // i
+        return result
+    return (math.factorial(big) // math.factorial(big - small)
                                                       // math.factorial(small))
 
 
+_math_comb = getattr(math, 'comb', None)
+'''`math.comb` on Python versions that have it, otherwise `None`.'''
+
+_n_pascal_rows = 64
+'''The number of rows of the Pascal triangle that `binomial` caches.'''
+
+_pascal_rows = None
+
+def _get_pascal_rows():
+    '''Get the first `_n_pascal_rows` rows of the Pascal triangle.'''
+    global _pascal_rows
+    if _pascal_rows is None:
+        rows = [(1,)]
+        for _ in range(_n_pascal_rows - 1):
+            previous_row = rows[-1]
+            rows.append((1,) + tuple(
+                left + right for left, right in
+                                       zip(previous_row, previous_row[1:])
+            ) + (1,))
+        _pascal_rows = tuple(rows)
+    return _pascal_rows
+
+
 def product(numbers):
     '''Get the product of all the numbers in `numbers`.'''
     from combi._python_toolbox import misc_tools
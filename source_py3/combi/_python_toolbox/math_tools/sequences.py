@@ -1,16 +1,95 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+import json
 import numbers
+import threading
 import collections
 import itertools
 
 infinity = float('inf')
 
 
-_stirling_caches = []
-_n_highest_cache_completed = -1
-def stirling(n, k, skip_calculation=False):
+class StirlingTable:
+    '''
+    Table of unsigned Stirling numbers of the first kind.
+    
+    Row `n` of the table is a tuple with the unsigned Stirling numbers of `n`
+    and `k` for every `k` from `0` to `n`. Each row is calculated in one go
+    from the row before it, using `c(n, k) = c(n-1, k-1) + (n-1) * c(n-1, k)`.
+    Rows are calculated when they're first needed; call `precompute` to
+    calculate them in advance, and use `save` and `load` to keep them on disk
+    between runs.
+    
+    The table is thread-safe.
+    '''
+    def __init__(self):
+        self._rows = [(1,)]
+        self.lock = threading.Lock()
+        '''Lock used while adding rows to make the table thread-safe.'''
+        
+    max_n = property(
+        lambda self: len(self._rows) - 1,
+        doc='''The number of the highest row that was calculated.'''
+    )
+    
+    def precompute(self, max_n):
+        '''Calculate all the rows of the table up to row `max_n`.'''
+        if max_n < len(self._rows):
+            return
+        with self.lock:
+            rows = self._rows
+            for n in range(len(rows), max_n + 1):
+                previous_row = rows[-1]
+                rows.append(tuple(
+                    [0] +
+                    [previous_row[k - 1] + (n - 1) * previous_row[k] for k in
+                                                              range(1, n)] +
+                    [1]
+                ))
+                
+    def row(self, n):
+        '''Get row `n` of the table, with the numbers for `k` up to `n`.'''
+        if n >= len(self._rows):
+            self.precompute(n)
+        return self._rows[n]
+    
+    def get(self, n, k):
+        '''Get the unsigned Stirling number of the first kind of n and k.'''
+        if not 0 <= k <= n:
+            return 0
+        return self.row(n)[k]
+    
+    def save(self, path):
+        '''Save the rows calculated so far to a file at `path`.'''
+        with self.lock:
+            rows = list(self._rows)
+        with open(path, 'w') as file:
+            json.dump(rows, file)
+            
+    def load(self, path):
+        '''
+        Load rows that were saved with `save` from the file at `path`.
+        
+        Rows that this table already has are kept as they are.
+        '''
+        with open(path) as file:
+            rows = json.load(file)
+        for n, row in enumerate(rows):
+            if len(row) != n + 1 or row[n] != 1 or not all(
+                               isinstance(x, numbers.Integral) for x in row):
+                raise ValueError("%r isn't a saved Stirling table." % path)
+        with self.lock:
+            self._rows.extend(
+                tuple(row) for row in rows[len(self._rows):]
+            )
+
+
+stirling_table = StirlingTable()
+'''The `StirlingTable` used by `stirling` and `abs_stirling`.'''
+
+
+def stirling(n, k):
     '''
     Calculate Stirling number of the second kind of `n` and `k`.
     
@@ -23,43 +102,7 @@ def stirling(n, k, skip_calculation=False):
         -3
     
     '''
-    global _n_highest_cache_completed
-    if k not in range(n + 1):
-        return 0
-    if n == k == 0:
-        return 1
-    if not skip_calculation:
-        for current_n in range(_n_highest_cache_completed + 1, n+1):
-            try:
-                cache = _stirling_caches[current_n]
-            except IndexError:
-                cache = []
-                _stirling_caches.append(cache)
-            calculate_up_to = min(k, current_n)
-            current_index = len(cache)
-            while current_index < calculate_up_to + 1:
-                if current_index == 0:
-                    cache.append(0)
-                elif current_index == current_n:
-                    cache.append(1)
-                else:
-                    cache.append(
-                        - (current_n - 1) * stirling(current_n - 1,
-                                                     current_index,
-                                                     skip_calculation=True) +
-                        stirling(current_n - 1, current_index - 1,
-                                 skip_calculation=True)
-                    )
-                
-                current_index += 1
-            if calculate_up_to == current_n:
-                _n_highest_cache_completed = max(
-                    _n_highest_cache_completed,
-                    current_n
-                )
-                
-                
-    return _stirling_caches[n][k]
+    return (-1) ** ((n - k) % 2) * abs_stirling(n, k)
 
 
 def abs_stirling(n, k):
@@ -75,5 +118,5 @@ def abs_stirling(n, k):
         3
     
     '''
-    return abs(stirling(n, k))
+    return stirling_table.get(n, k)
     
@@ -0,0 +1,632 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import os
+import itertools
+import operator
+import bisect
+import collections
+import concurrent.futures
+
+from combi._python_toolbox import sequence_tools
+
+from . import combinadic
+
+
+def _run_chunk(perm_space, start, stop, function, is_filter, raw):
+    '''
+    Call `function` on the perms of `perm_space` from `start` to `stop`.
+    
+    This runs in a worker process of `PermSpace.parallel_map` and
+    `PermSpace.parallel_filter`. Only the perm at `start` is unranked; we walk
+    from it to the rest of the perms. Returns a list of the results, or for
+    `is_filter`, a list of the sequences of the perms that passed.
+    '''
+    results = []
+    for perm_sequence in itertools.islice(
+                      perm_space._iterate_perm_sequences(start), stop - start):
+        result = function(perm_sequence if raw else
+                          perm_space.perm_type(perm_sequence, perm_space))
+        if not is_filter:
+            results.append(result)
+        elif result:
+            results.append(perm_sequence)
+    return results
+
+
+class _IteratingMixin:
+    '''
+    Mixin for `PermSpace` to iterate over perms incrementally.
+    
+    Getting a perm by index number means going through the whole unranking
+    process for that index. When iterating over a space we don't have to do
+    that; we unrank only the first perm, and then we get each perm from the
+    previous one by walking to its successor, similarly to the classic
+    next-lexicographic-permutation algorithm. The order of the perms is always
+    the same as the order of index numbers.
+    '''
+    
+    __iter__ = lambda self: (self.perm_type(perm_sequence, self) for
+                             perm_sequence in self._iterate_perm_sequences())
+    
+    def iter_raw(self):
+        '''
+        Iterate over the perms of this space as plain tuples.
+        
+        The tuples come in the same order as the perms when iterating over the
+        space, and each tuple is equal to `tuple(perm)` of its perm. Creating
+        `Perm` objects takes most of the time of iteration, so this is useful
+        for hot loops that don't need their functionality.
+        '''
+        return self._iterate_perm_sequences()
+    
+    
+    def iter_revolving_door(self, raw=False):
+        '''
+        Iterate over the combs of this space in revolving-door order.
+        
+        This is an alternative to the usual lexicographic order, in which each
+        comb differs from the one before it by exactly one item going out and
+        another one coming in. Only combination spaces that aren't recurrent or
+        sliced support this. If `raw=True` is given, the combs are plain
+        tuples, like in `iter_raw`.
+        '''
+        if not self.is_combination or self.is_recurrent or self.is_sliced:
+            raise TypeError(
+                "Revolving-door order is only supported for combination "
+                "spaces. Recurrent and sliced spaces aren't supported."
+            )
+        sequence = self.sequence
+        perm_sequences = (
+            tuple([sequence[i] for i in indices]) for indices in
+            combinadic.iterate_revolving_door(self.sequence_length,
+                                              self.n_elements)
+        )
+        if raw:
+            return perm_sequences
+        return (self.perm_type(perm_sequence, self) for perm_sequence in
+                                                                perm_sequences)
+    
+    
+    def get_many(self, indices, raw=False):
+        '''
+        Get the perms with the given index numbers.
+        
+        This is like `[perm_space[i] for i in indices]`, except faster. We go
+        over the index numbers in sorted order, and when an index number is
+        close enough to the previous one, we get to its perm by walking forward
+        from the previous perm instead of unranking it from scratch.
+        
+        If `raw=True` is given, the perms are returned as plain tuples, like in
+        `iter_raw`.
+        '''
+        length = self.length
+        normalized_indices = []
+        for i in indices:
+            i = operator.index(i)
+            if i <= -1:
+                i += length
+            if not (0 <= i < length):
+                raise IndexError
+            normalized_indices.append(i)
+        
+        # Walking one step is roughly as expensive as a `sequence_length`th of
+        # unranking, except in recurrent spaces, where unranking creates
+        # sub-spaces and is much slower:
+        max_n_steps_to_walk = self.sequence_length ** \
+                                                (2 if self.is_recurrent else 1)
+        sorted_indices = sorted(set(normalized_indices))
+        perm_sequences = {}
+        iterator = None
+        for i, next_i in zip(sorted_indices,
+                             itertools.chain(sorted_indices[1:], (None,))):
+            if iterator is not None and \
+                                     i - iterator_index <= max_n_steps_to_walk:
+                perm_sequences[i] = next(
+                    itertools.islice(iterator, i - iterator_index, None)
+                )
+            elif next_i is not None and next_i - i <= max_n_steps_to_walk:
+                iterator = self._iterate_perm_sequences(i)
+                perm_sequences[i] = next(iterator)
+            else:
+                iterator = None
+                perm_sequences[i] = tuple(self[i]._perm_sequence)
+            iterator_index = i + 1
+        
+        if not raw:
+            for i, perm_sequence in perm_sequences.items():
+                perm_sequences[i] = self.perm_type(perm_sequence, self)
+        return [perm_sequences[i] for i in normalized_indices]
+    
+    
+    def to_array(self, start=None, stop=None):
+        '''
+        Get the perms from `start` to `stop` as a 2-D NumPy array.
+        
+        The array has a row for each perm that `perm_space[start:stop]` would
+        have. The row has the indices in `perm_space.sequence` of the perm's
+        items, so for spaces that aren't rapplied it's the perm's items
+        themselves. If an item appears in the sequence more than once, each
+        of its appearances in the perm gets the index of a different one of
+        its appearances in the sequence.
+        
+        For combination spaces, the array is a boolean mask instead, with a
+        column for every index in the sequence, saying whether the item in that
+        index is in the combination.
+        
+        The perms are generated in bulk, without creating `Perm` objects. This
+        method requires NumPy, though Combi itself doesn't.
+        '''
+        import numpy
+        canonical_slice = sequence_tools.CanonicalSlice(slice(start, stop),
+                                                        self.length)
+        n_perms = canonical_slice.stop - canonical_slice.start
+        perm_sequences = itertools.islice(
+            self._iterate_perm_sequences(canonical_slice.start), n_perms
+        )
+        
+        if not self.is_rapplied:
+            index_sequences = perm_sequences
+        elif not self.is_recurrent:
+            index_of_value = {value: i for i, value in
+                                                     enumerate(self.sequence)}
+            index_sequences = (map(index_of_value.__getitem__, perm_sequence)
+                               for perm_sequence in perm_sequences)
+        else:
+            positions = {}
+            for i, value in enumerate(self.sequence):
+                positions.setdefault(value, []).append(i)
+            def get_index_sequence(perm_sequence):
+                n_appearances = dict.fromkeys(perm_sequence, 0)
+                for value in perm_sequence:
+                    yield positions[value][n_appearances[value]]
+                    n_appearances[value] += 1
+            index_sequences = (get_index_sequence(perm_sequence) for
+                               perm_sequence in perm_sequences)
+        
+        array = numpy.fromiter(
+            itertools.chain.from_iterable(index_sequences), dtype=int,
+            count=n_perms * self.n_elements
+        ).reshape((n_perms, self.n_elements))
+        
+        if self.is_combination:
+            mask = numpy.zeros((n_perms, self.sequence_length), dtype=bool)
+            mask[numpy.arange(n_perms)[:, numpy.newaxis], array] = True
+            return mask
+        else:
+            return array
+    
+    
+    def parallel_map(self, function, n_workers=None, chunk_size=None,
+                     ordered=True, raw=False):
+        '''
+        Iterate over the results of `function` on every perm, using processes.
+        
+        The space is cut into chunks of `chunk_size` consecutive perms, which
+        are handed to a `concurrent.futures.ProcessPoolExecutor` with
+        `n_workers` processes. (The default is the number of CPUs.) Each
+        worker gets just the perm space and the edges of its chunk; it unranks
+        the first perm of the chunk and iterates from there, so no perms are
+        sent between processes. `function` must be picklable, e.g. a function
+        defined at module level.
+        
+        Results come in the order of the perms, unless `ordered=False` is
+        given, in which case each chunk's results come as soon as they're
+        ready. If `raw=True` is given, `function` gets plain tuples instead of
+        perms, like in `iter_raw`.
+        '''
+        return self._iterate_in_parallel(function, False, n_workers,
+                                         chunk_size, ordered, raw)
+    
+    
+    def parallel_filter(self, function, n_workers=None, chunk_size=None,
+                        ordered=True, raw=False):
+        '''
+        Iterate over the perms for which `function` returns true, using
+        processes.
+        
+        This works like `parallel_map`, except it yields the perms themselves.
+        If `raw=True` is given, both `function` and the caller get plain tuples
+        instead of perms.
+        '''
+        return self._iterate_in_parallel(function, True, n_workers,
+                                         chunk_size, ordered, raw)
+    
+    
+    def _iterate_in_parallel(self, function, is_filter, n_workers,
+                             chunk_size, ordered, raw):
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        if n_workers < 1:
+            raise ValueError('`n_workers` must be positive.')
+        if chunk_size is None:
+            # Enough chunks to keep the workers busy when some chunks take
+            # longer than others, but not so many that the overhead matters:
+            chunk_size = max(min(-(-self.length // (4 * n_workers)), 10000), 1)
+        if chunk_size < 1:
+            raise ValueError('`chunk_size` must be positive.')
+        results = self._iterate_chunk_results_in_parallel(
+            function, is_filter, n_workers, chunk_size, ordered, raw
+        )
+        if is_filter and not raw:
+            return (self.perm_type(perm_sequence, self) for perm_sequence in
+                                                                       results)
+        return results
+    
+    
+    def _iterate_chunk_results_in_parallel(self, function, is_filter,
+                                           n_workers, chunk_size, ordered,
+                                           raw):
+        length = self.length
+        chunk_starts = iter(range(0, length, chunk_size))
+        # We keep only a few chunks in flight at a time, so a huge space won't
+        # flood the executor with tasks, or the memory with results:
+        max_n_pending_futures = 2 * n_workers
+        with concurrent.futures.ProcessPoolExecutor(n_workers) as executor:
+            pending_futures = collections.deque()
+            def submit_chunks():
+                n_chunks = max_n_pending_futures - len(pending_futures)
+                for start in itertools.islice(chunk_starts, n_chunks):
+                    stop = min(start + chunk_size, length)
+                    pending_futures.append(executor.submit(
+                        _run_chunk, self, start, stop, function, is_filter, raw
+                    ))
+            try:
+                submit_chunks()
+                while pending_futures:
+                    if ordered:
+                        future = pending_futures.popleft()
+                    else:
+                        future = next(concurrent.futures.as_completed(
+                                                              pending_futures))
+                        pending_futures.remove(future)
+                    chunk_results = future.result()
+                    submit_chunks()
+                    for result in chunk_results:
+                        yield result
+            finally:
+                for future in pending_futures:
+                    future.cancel()
+    
+    
+    def _iterate_perm_sequences(self, start=0):
+        '''
+        Iterate over the sequences of the perms in this space.
+        
+        The iteration starts from the perm with index number `start`. The
+        sequences are tuples, identical to the sequences of the perms that
+        `__getitem__` would return for the same index numbers.
+        '''
+        if not (0 <= start < self.length):
+            return iter(())
+        elif self.is_sliced:
+            return itertools.islice(
+                self.unsliced._iterate_perm_sequences(
+                                           start + self.canonical_slice.start),
+                self.length - start
+            )
+        elif self.is_dapplied:
+            return self.undapplied._iterate_perm_sequences(start)
+        elif self.is_degreed:
+            return self._iterate_perm_sequences_of_degreed(start)
+        elif self.is_recurrent:
+            return self._iterate_perm_sequences_recurrently(start)
+        elif self.is_fixed:
+            return self._iterate_perm_sequences_of_fixed(start)
+        elif self.is_combination:
+            return self._iterate_perm_sequences_of_combination(start)
+        else:
+            return self._iterate_perm_sequences_lexicographically(start)
+    
+    
+    def _iterate_perm_sequences_of_fixed(self, start):
+        '''
+        Iterate over perm sequences of a fixed space.
+        
+        We iterate over the perm space of the free values, and put the fixed
+        values in their places.
+        '''
+        wip_perm_sequence = [self._undapplied_fixed_map.get(i) for i in
+                             range(self.n_elements)]
+        free_indices = [i for i in range(self.n_elements) if i not in
+                                                    self._undapplied_fixed_map]
+        free_values_perm_space = self._free_values_unsliced_perm_space
+        for free_values_perm_sequence in \
+                     free_values_perm_space._iterate_perm_sequences(start):
+            for i, value in zip(free_indices, free_values_perm_sequence):
+                wip_perm_sequence[i] = value
+            yield tuple(wip_perm_sequence)
+    
+    
+    def _iterate_perm_sequences_lexicographically(self, start):
+        '''
+        Iterate over perm sequences of a space that's pure, except rapplied or
+        partial.
+        
+        We work on a list of integer indices to the sequence. The first
+        `n_elements` indices are the current perm, and the rest are the unused
+        indices in rising order. To get to the next perm, we reverse the unused
+        indices, making this the last arrangement that starts with the current
+        perm, and then we do a next-lexicographic-permutation step on the
+        entire list.
+        '''
+        sequence = self.sequence
+        n_elements = self.n_elements
+        first_perm_sequence = tuple(self[start]._perm_sequence)
+        if self.is_rapplied:
+            index_of_value = {value: i for i, value in enumerate(sequence)}
+            indices = [index_of_value[value] for value in first_perm_sequence]
+        else:
+            indices = list(first_perm_sequence)
+        used_indices = set(indices)
+        indices.extend(i for i in range(self.sequence_length)
+                       if i not in used_indices)
+        last_index = len(indices) - 1
+        
+        yield first_perm_sequence
+        while True:
+            indices[n_elements:] = indices[n_elements:][::-1]
+            
+            ### Doing a next-lexicographic-permutation step: ##################
+            #                                                                 #
+            i = last_index - 1
+            while i >= 0 and indices[i] > indices[i + 1]:
+                i -= 1
+            if i < 0:
+                return
+            j = last_index
+            while indices[j] < indices[i]:
+                j -= 1
+            indices[i], indices[j] = indices[j], indices[i]
+            indices[i + 1:] = indices[i + 1:][::-1]
+            #                                                                 #
+            ### Finished doing a next-lexicographic-permutation step. #########
+            
+            if self.is_rapplied:
+                yield tuple([sequence[k] for k in indices[:n_elements]])
+            else:
+                yield tuple(indices[:n_elements])
+    
+    
+    def _iterate_perm_sequences_of_combination(self, start):
+        '''
+        Iterate over perm sequences of a non-recurrent combination space.
+        
+        We work on a list of rising integer indices to the sequence, and get
+        to the next combination by incrementing the last index that can be
+        incremented and resetting all the indices after it.
+        '''
+        sequence = self.sequence
+        n_elements = self.n_elements
+        first_perm_sequence = tuple(self[start]._perm_sequence)
+        if self.is_rapplied:
+            index_of_value = {value: i for i, value in enumerate(sequence)}
+            indices = [index_of_value[value] for value in first_perm_sequence]
+        else:
+            indices = list(first_perm_sequence)
+        n_unused_elements = self.n_unused_elements
+        
+        yield first_perm_sequence
+        while True:
+            i = n_elements - 1
+            while i >= 0 and indices[i] == n_unused_elements + i:
+                i -= 1
+            if i < 0:
+                return
+            indices[i] += 1
+            for j in range(i + 1, n_elements):
+                indices[j] = indices[j - 1] + 1
+            if self.is_rapplied:
+                yield tuple([sequence[k] for k in indices])
+            else:
+                yield tuple(indices)
+    
+    
+    def _iterate_perm_sequences_recurrently(self, start):
+        '''
+        Iterate over perm sequences of a recurrent space.
+        
+        `__getitem__` goes down a tree of candidate values, creating a
+        sub-space for every candidate just to learn its length. Here we walk
+        the same tree depth-first, keeping the state of the walk between perms,
+        and we never create sub-spaces, because all we need to know about a
+        candidate is whether its sub-space is empty, which we can tell
+        directly.
+        
+        The candidates for a position are the values that are still available,
+        ordered by the first index in the sequence in which they're still
+        available. For combinations, every candidate that we pass over is added
+        to `shit_set` and is excluded for the rest of the walk under the
+        current prefix, like in `__getitem__`.
+        '''
+        sequence = self.sequence
+        sequence_length = self.sequence_length
+        n_elements = self.n_elements
+        is_combination = self.is_combination
+        fixed_map = self.fixed_map
+        
+        positions = {}
+        for i, value in enumerate(sequence):
+            positions.setdefault(value, []).append(i)
+        n_removed = dict.fromkeys(positions, 0)
+        n_reserved = dict.fromkeys(positions, 0)
+        for value in fixed_map.values():
+            n_reserved[value] += 1
+        shit_set = set()
+        
+        wip_perm_sequence = [None] * n_elements
+        candidates_of_position = [None] * n_elements
+        candidate_index_of_position = [None] * n_elements
+        
+        def get_candidates():
+            return sorted(
+                (value for value, value_positions in positions.items() if
+                 value not in shit_set and len(value_positions) >
+                                       n_removed[value] + n_reserved[value]),
+                key=lambda value: positions[value][n_removed[value]]
+            )
+        
+        def has_completions(j, value):
+            if not is_combination:
+                return True
+            cut = positions[value][n_removed[value]] + 1
+            n_items_after_cut = sequence_length - cut - sum(
+                len(positions[shit]) - bisect.bisect_left(positions[shit], cut)
+                                                         for shit in shit_set
+            )
+            return n_items_after_cut >= n_elements - j - 1
+        
+        def choose(j, candidate_index):
+            candidates = candidates_of_position[j]
+            for k in range(candidate_index, len(candidates)):
+                value = candidates[k]
+                if has_completions(j, value):
+                    candidate_index_of_position[j] = k
+                    wip_perm_sequence[j] = value
+                    n_removed[value] += 1
+                    return True
+                elif is_combination:
+                    shit_set.add(value)
+            return False
+        
+        def fill(start_position, perm_sequence=None):
+            for j in range(start_position, n_elements):
+                if j in fixed_map:
+                    value = wip_perm_sequence[j] = fixed_map[j]
+                    n_removed[value] += 1
+                    n_reserved[value] -= 1
+                    continue
+                candidates = candidates_of_position[j] = get_candidates()
+                if perm_sequence is None:
+                    candidate_index = 0
+                else:
+                    candidate_index = candidates.index(perm_sequence[j])
+                    if is_combination:
+                        shit_set.update(candidates[:candidate_index])
+                if not choose(j, candidate_index):
+                    raise RuntimeError
+        
+        first_perm_sequence = tuple(self[start]._perm_sequence)
+        fill(0, first_perm_sequence)
+        yield first_perm_sequence
+        
+        j = n_elements - 1
+        while j >= 0:
+            value = wip_perm_sequence[j]
+            n_removed[value] -= 1
+            if j in fixed_map:
+                n_reserved[value] += 1
+                j -= 1
+                continue
+            if is_combination:
+                shit_set.add(value)
+            if choose(j, candidate_index_of_position[j] + 1):
+                fill(j + 1)
+                yield tuple(wip_perm_sequence)
+                j = n_elements - 1
+            else:
+                if is_combination:
+                    shit_set.difference_update(candidates_of_position[j])
+                j -= 1
+    
+    
+    def _iterate_perm_sequences_of_degreed(self, start):
+        '''
+        Iterate over perm sequences of a degreed space.
+        
+        We walk depth-first over the same tree of candidates that
+        `__getitem__` goes over. We keep track of the chains formed by the
+        items that already have a value, so we can tell in constant time
+        whether a candidate closes a cycle, and then `_degreed_length_table`
+        tells us whether the candidate has any completions.
+        '''
+        if self.is_rapplied:
+            sequence = self.sequence
+            for perm_sequence in \
+                               self.unrapplied._iterate_perm_sequences(start):
+                yield tuple([sequence[k] for k in perm_sequence])
+            return
+        
+        fixed_map = self.fixed_map
+        length_table = self._degreed_length_table
+        free_values = tuple(self.free_values)
+        free_indices = [j for j in range(self.sequence_length) if
+                                                           j not in fixed_map]
+        n_free_indices = len(free_indices)
+        
+        # Chains of items that have a value, keyed by their two ends:
+        end_of_chain = {}
+        start_of_chain = {}
+        
+        def link(j, value):
+            chain_start = start_of_chain.pop(j, j)
+            chain_end = end_of_chain.pop(value, value)
+            if chain_end != j:
+                end_of_chain[chain_start] = chain_end
+                start_of_chain[chain_end] = chain_start
+            return (chain_start, chain_end)
+        
+        def unlink(j, value, chain_start, chain_end):
+            if chain_end != j:
+                del end_of_chain[chain_start]
+                del start_of_chain[chain_end]
+            if chain_start != j:
+                end_of_chain[chain_start] = j
+                start_of_chain[j] = chain_start
+            if chain_end != value:
+                end_of_chain[value] = chain_end
+                start_of_chain[chain_end] = value
+        
+        for j, value in fixed_map.items():
+            link(j, value)
+        
+        is_used = [False] * self.sequence_length
+        wip_perm_sequence = [fixed_map.get(j) for j in
+                                              range(self.sequence_length)]
+        value_index_of_position = [None] * n_free_indices
+        link_of_position = [None] * n_free_indices
+        n_cycles_before_position = [None] * (n_free_indices + 1)
+        n_cycles_before_position[0] = \
+                                    self._n_cycles_in_fixed_items_of_just_fixed
+        
+        def choose(t, value_index):
+            j = free_indices[t]
+            n_free_items = n_free_indices - t - 1
+            n_cycles = n_cycles_before_position[t]
+            for value_index in range(value_index, n_free_indices):
+                value = free_values[value_index]
+                if is_used[value]:
+                    continue
+                closed_cycle = (end_of_chain.get(value, value) == j)
+                if length_table[n_free_items][n_cycles + closed_cycle]:
+                    is_used[value] = True
+                    wip_perm_sequence[j] = value
+                    value_index_of_position[t] = value_index
+                    link_of_position[t] = link(j, value)
+                    n_cycles_before_position[t + 1] = n_cycles + closed_cycle
+                    return True
+            return False
+        
+        def unchoose(t):
+            j = free_indices[t]
+            value = wip_perm_sequence[j]
+            is_used[value] = False
+            unlink(j, value, *link_of_position[t])
+        
+        first_perm_sequence = tuple(self[start]._perm_sequence)
+        for t, j in enumerate(free_indices):
+            if not choose(t, free_values.index(first_perm_sequence[j])):
+                raise RuntimeError
+        yield first_perm_sequence
+        
+        t = n_free_indices - 1
+        while t >= 0:
+            unchoose(t)
+            if choose(t, value_index_of_position[t] + 1):
+                for next_t in range(t + 1, n_free_indices):
+                    if not choose(next_t, 0):
+                        raise RuntimeError
+                yield tuple(wip_perm_sequence)
+                t = n_free_indices - 1
+            else:
+                t -= 1
@@ -0,0 +1,186 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Ranking, unranking and revolving-door iteration of combinations.
+
+A combination here is an ascending tuple of `n_elements` index numbers from
+`range(sequence_length)`. Combinations are ranked in lexicographic order, which
+is the order of `CombSpace`.
+
+Ranking and unranking both come down to binomials `binomial(j, i)` where `i`
+goes down by one for each item and `j` only goes down. So instead of
+calculating each binomial from scratch, we walk from one binomial to the next
+with one multiplication and one division: `binomial(j - 1, i)` is
+`binomial(j, i) * (j - i) / j` and `binomial(j - 1, i - 1)` is
+`binomial(j, i) * i / j`. That's about `sequence_length` steps in total. When
+`sequence_length` is much bigger than `n_elements`, we instead search for each
+`j` using logarithms of binomials, and calculate the binomials there directly.
+'''
+
+import math
+
+from combi._python_toolbox import math_tools
+
+
+def _get_log(number):
+    '''Get the natural logarithm of a positive integer of any size.'''
+    n_extra_bits = max(number.bit_length() - 53, 0)
+    return math.log(number >> n_extra_bits) + n_extra_bits * math.log(2)
+
+
+def _get_log_binomial(big, small):
+    '''Get the natural logarithm of `binomial(big, small)`.'''
+    return math.lgamma(big + 1) - math.lgamma(small + 1) - \
+                                                  math.lgamma(big - small + 1)
+
+
+def _search_binomial(number, small, stop):
+    '''
+    Find the highest `big` below `stop` with `binomial(big, small) <= number`.
+    
+    Returns `(big, binomial(big, small))`. It's assumed that `small` is
+    positive and that `binomial(stop, small) > number`.
+    '''
+    if number == 0:
+        return (small - 1, 0)
+    # Binary search with logarithms, which might be off by a little:
+    log_number = _get_log(number)
+    low, high = small, stop - 1
+    while low < high:
+        middle = (low + high + 1) // 2
+        if _get_log_binomial(middle, small) <= log_number:
+            low = middle
+        else:
+            high = middle - 1
+    # Fixing it up with exact binomials:
+    big = low
+    binomial = math_tools.binomial(big, small)
+    while binomial > number:
+        binomial = binomial * (big - small) // big
+        big -= 1
+    while big + 1 < stop:
+        next_binomial = binomial * (big + 1) // (big + 1 - small)
+        if next_binomial > number:
+            break
+        big += 1
+        binomial = next_binomial
+    return (big, binomial)
+
+
+def unrank_combination(number, sequence_length, n_elements, search=None):
+    '''
+    Get the combination whose index number in lexicographic order is `number`.
+    
+    Returns an ascending tuple of `n_elements` index numbers from
+    `range(sequence_length)`. Specify `search=True` or `search=False` to force
+    searching for each item or walking down to it; by default it's chosen by
+    the sizes.
+    '''
+    if search is None:
+        # Walking takes about `sequence_length` steps in total, while searching
+        # takes about `n_elements` steps for each item, plus the search.
+        search = sequence_length > n_elements * (n_elements + 20)
+    wip_number = \
+           math_tools.binomial(sequence_length, n_elements) - 1 - number
+    indices = []
+    j = sequence_length
+    binomial = math_tools.binomial(j, n_elements)
+    for i in range(n_elements, 0, -1):
+        # At this point `binomial == math_tools.binomial(j, i)`, and we're
+        # looking for the highest `j` for which it's at most `wip_number`.
+        if binomial > wip_number:
+            if search:
+                j, binomial = _search_binomial(wip_number, i, j)
+            else:
+                while binomial > wip_number:
+                    binomial = binomial * (j - i) // j
+                    j -= 1
+        indices.append(sequence_length - 1 - j)
+        wip_number -= binomial
+        binomial = binomial * i // j if j else 0
+        j -= 1
+    return tuple(indices)
+
+
+def rank_combination(indices, sequence_length, search=None):
+    '''
+    Get the index number in lexicographic order of a combination.
+    
+    `indices` is an ascending sequence of index numbers from
+    `range(sequence_length)`. Specify `search=True` or `search=False` to force
+    calculating the binomial of each item directly or walking down to it; by
+    default it's chosen by the sizes.
+    '''
+    n_elements = len(indices)
+    if search is None:
+        search = sequence_length > n_elements ** 2
+    if not n_elements:
+        return 0
+    if search:
+        total = sum(
+            math_tools.binomial(sequence_length - 1 - index, n_elements - k)
+                                           for k, index in enumerate(indices)
+        )
+    else:
+        j = sequence_length - 1 - indices[0]
+        i = n_elements
+        binomial = total = math_tools.binomial(j, i)
+        for index in indices[1:]:
+            binomial = binomial * i // j if j else 0
+            j -= 1
+            i -= 1
+            while j > sequence_length - 1 - index:
+                binomial = binomial * (j - i) // j
+                j -= 1
+            total += binomial
+    return math_tools.binomial(sequence_length, n_elements) - 1 - total
+
+
+def iterate_revolving_door(sequence_length, n_elements):
+    '''
+    Iterate over combinations in revolving-door order.
+    
+    Each combination differs from the one before it by exactly one index
+    number going out and another one coming in. This is algorithm R from
+    section 7.2.1.3 of Knuth's "The Art of Computer Programming".
+    '''
+    n, t = sequence_length, n_elements
+    if not 0 <= t <= n:
+        return
+    elif t in (0, n):
+        yield tuple(range(t))
+        return
+    elif t == 1:
+        for index in range(n):
+            yield (index,)
+        return
+    
+    # `c[1:t+1]` is the current combination, and `c[t+1]` is a sentinel:
+    c = [None] + list(range(t)) + [n]
+    while True:
+        yield tuple(c[1:t+1])
+        if t % 2:
+            if c[1] + 1 < c[2]:
+                c[1] += 1
+                continue
+            j, try_decreasing = 2, True
+        else:
+            if c[1] > 0:
+                c[1] -= 1
+                continue
+            j, try_decreasing = 2, False
+        while True:
+            if try_decreasing:
+                if c[j] >= j:
+                    c[j], c[j - 1] = c[j - 1], j - 2
+                    break
+                j += 1
+            else:
+                if c[j] + 1 < c[j + 1]:
+                    c[j - 1], c[j] = c[j], c[j] + 1
+                    break
+                j += 1
+                if j > t:
+                    return
+            try_decreasing = not try_decreasing
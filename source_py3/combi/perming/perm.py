@@ -5,6 +5,9 @@ import functools
 import abc
 import collections
 import numbers
+import random
+import math
+import array
 
 from combi._python_toolbox import misc_tools
 from combi._python_toolbox import nifty_collections
@@ -12,12 +15,87 @@ from combi._python_toolbox import caching
 from combi._python_toolbox import sequence_tools
 from combi._python_toolbox import cute_iter_tools
 
-from .. import misc
-
 
 infinity = float('inf')
 
 
+def _compose_two_perm_sequences(left_perm_sequence, right_perm_sequence):
+    '''Compose two raw perm sequences, like `left_perm * right_perm`.'''
+    return tuple([left_perm_sequence[i] for i in right_perm_sequence])
+
+
+def _get_packing_typecode(sequence_length):
+    '''
+    Get the smallest `array` typecode for index numbers of a sequence.
+    
+    Returns `None` if the sequence is too long for any of them.
+    '''
+    for typecode in ('B', 'H', 'I'):
+        if sequence_length <= 256 ** array.array(typecode).itemsize:
+            return typecode
+    return None
+
+
+def _get_perm_from_packed_perm_sequence(perm_type, perm_space, typecode,
+                                        packed_perm_sequence):
+    '''
+    Make a perm from what `Perm.__reduce__` saved.
+    
+    If `typecode` is `None`, `packed_perm_sequence` is just the perm sequence.
+    If `perm_space` is a `bytes` object, it's the pickling digest of a space
+    that's registered for pickling.
+    '''
+    if isinstance(perm_space, bytes):
+        perm_space = _get_registered_perm_space(perm_space)
+    if typecode is None:
+        return perm_type(packed_perm_sequence, perm_space)
+    indices = array.array(typecode)
+    indices.frombytes(packed_perm_sequence)
+    if perm_space.is_rapplied:
+        sequence = perm_space.sequence
+        perm_sequence = tuple(sequence[i] for i in indices)
+    else:
+        perm_sequence = tuple(indices)
+    return perm_type(perm_sequence, perm_space)
+
+
+def _iterate_swaps(positions, n_swaps, stop=None):
+    '''
+    Iterate over the ways to rearrange `positions` with `n_swaps` swaps.
+    
+    Yields tuples of `(a, b)` pairs of positions. Swapping the items at the
+    positions of each pair in turn gives every rearrangement of degree
+    `n_swaps` exactly once. This is because every permutation of degree `k`
+    can be written in exactly one way as `k` transpositions `(a, b)` where `a`
+    comes before `b` and the `b`s are in increasing order.
+    
+    If `stop` is given, only the first `stop` positions are used as `b`s.
+    '''
+    if stop is None:
+        stop = len(positions)
+    if n_swaps == 0:
+        yield ()
+        return
+    for b_index in range(n_swaps, stop):
+        b = positions[b_index]
+        for earlier_swaps in _iterate_swaps(positions, n_swaps - 1, b_index):
+            for a in positions[:b_index]:
+                yield earlier_swaps + ((a, b),)
+                
+                
+def _count_cycles(pure_perm_sequence):
+    '''Count the cycles in a pure perm sequence, like `Perm.n_cycles`.'''
+    n_cycles = 0
+    unvisited = [True] * len(pure_perm_sequence)
+    for i in range(len(pure_perm_sequence)):
+        if unvisited[i]:
+            n_cycles += 1
+            while unvisited[i]:
+                unvisited[i] = False
+                i = pure_perm_sequence[i]
+    return n_cycles
+
+
 class _BasePermView(metaclass=abc.ABCMeta):
     '''
     Abstract base class for viewers on Perm.
@@ -55,6 +133,32 @@ class PermAsDictoid(sequence_tools.CuteSequenceMixin, _BasePermView,
         
     
 
+class _PermCachedProperty(caching.CachedProperty):
+    '''
+    A `CachedProperty` that caches its value in the perm's `_cached_values`.
+    
+    `Perm` uses `__slots__`, so it doesn't have an instance `__dict__` to cache
+    values in. The `_cached_values` dict is created only when the first value
+    is cached, so perms that never use a cached property don't pay for it.
+    '''
+    def __get__(self, perm, our_type=None):
+        if perm is None:
+            return self
+        name = self.get_our_name(perm, our_type=our_type)
+        cached_values = perm._cached_values
+        if cached_values is None:
+            cached_values = perm._cached_values = {}
+        try:
+            return cached_values[name]
+        except KeyError:
+            value = self.getter(perm)
+            if value is not perm:
+                # (Not caching the perm itself, like `unrapplied` of a perm
+                # that isn't rapplied, to avoid a reference cycle.)
+                cached_values[name] = value
+            return value
+
+
 class PermType(abc.ABCMeta):
     '''
     Metaclass for `Perm` and `Comb`.
@@ -88,6 +192,8 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.Sequence,
     
     '''
     
+    __slots__ = ('nominal_perm_space', '_perm_sequence', '_cached_values')
+    
     @classmethod
     def coerce(cls, item, perm_space=None):
         '''Coerce item into a perm, optionally of a specified `PermSpace`.'''
@@ -131,27 +237,71 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.Sequence,
         #                                                                     #
         ### Finished analyzing `perm_space`. ##################################
         
-        self.is_rapplied = self.nominal_perm_space.is_rapplied
-        self.is_recurrent = self.nominal_perm_space.is_recurrent
-        self.is_partial = self.nominal_perm_space.is_partial
-        self.is_combination = self.nominal_perm_space.is_combination
-        self.is_dapplied = self.nominal_perm_space.is_dapplied
-        self.is_pure = not (self.is_rapplied or self.is_dapplied
-                            or self.is_partial or self.is_combination)
-        
-        if not self.is_rapplied: self.unrapplied = self
-        if not self.is_dapplied: self.undapplied = self
-        if not self.is_combination: self.uncombinationed = self
-        
+        self._cached_values = None
         self._perm_sequence = sequence_tools. \
              ensure_iterable_is_immutable_sequence(perm_sequence)
             
         assert self.is_combination == isinstance(self, Comb)
             
             
+    is_rapplied = property(
+        lambda self: self.nominal_perm_space.is_rapplied
+    )
+    is_recurrent = property(
+        lambda self: self.nominal_perm_space.is_recurrent
+    )
+    is_partial = property(
+        lambda self: self.nominal_perm_space.is_partial
+    )
+    is_combination = property(
+        lambda self: self.nominal_perm_space.is_combination
+    )
+    is_dapplied = property(
+        lambda self: self.nominal_perm_space.is_dapplied
+    )
+    is_pure = property(
+        lambda self: not (self.is_rapplied or self.is_dapplied or
+                          self.is_partial or self.is_combination)
+    )
+    
     _reduced = property(lambda self: (
         type(self), self._perm_sequence, self.nominal_perm_space
     ))
+    
+    def __reduce__(self):
+        # We pickle the perm as the index numbers of its items in the sequence,
+        # packed as bytes. The space is pickled compactly, see
+        # `PermSpace._compact_arguments`, and pickling many perms of it
+        # together pickles it only once. If the space is registered for
+        # pickling, we pickle just its digest, see
+        # `PermSpace.register_for_pickling`.
+        perm_space = self.nominal_perm_space
+        if perm_space.is_registered_for_pickling:
+            pickled_perm_space = perm_space._pickling_digest
+        else:
+            pickled_perm_space = perm_space
+        typecode = _get_packing_typecode(perm_space.sequence_length)
+        if typecode is not None:
+            try:
+                if perm_space.is_rapplied:
+                    positions_of_items = \
+                                        perm_space._positions_of_sequence_items
+                    indices = [positions_of_items[item][0] for item in
+                                                           self._perm_sequence]
+                else:
+                    indices = self._perm_sequence
+                packed_perm_sequence = \
+                                    array.array(typecode, indices).tobytes()
+            except (TypeError, KeyError, OverflowError):
+                # Unhashable items, or a perm sequence that doesn't fit its
+                # space. We'll just save the perm sequence as it is.
+                pass
+            else:
+                return (_get_perm_from_packed_perm_sequence,
+                        (type(self), pickled_perm_space, typecode,
+                         packed_perm_sequence))
+        return (_get_perm_from_packed_perm_sequence,
+                (type(self), pickled_perm_space, None, self._perm_sequence))
             
     __iter__ = lambda self: iter(self._perm_sequence)
     
@@ -200,7 +350,7 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.Sequence,
                domain[numerical_index] if self.is_dapplied else numerical_index
         
 
-    @caching.CachedProperty
+    @_PermCachedProperty
     def inverse(self):
         '''
         The inverse of this permutation.
@@ -239,27 +389,30 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.Sequence,
         
     __invert__ = lambda self: self.inverse
     
-    domain = caching.CachedProperty(
+    domain = _PermCachedProperty(
         lambda self: self.nominal_perm_space.domain,
         '''The permutation's domain.'''
     )
     
         
-    @caching.CachedProperty
+    @_PermCachedProperty
     def unrapplied(self):
         '''An unrapplied version of this permutation.'''
+        if not self.is_rapplied:
+            return self
         ### Calculating the new perm sequence: ################################
         #                                                                     #
         # This is more complex than a one-line generator because of recurrent
         # perms; every time there's a recurrent item, we need to take not
         # necessary the index of its first occurrence in the rapplied sequence
         # but the first index we haven't taken already.
-        rapplied_sequence = list(self.nominal_perm_space.sequence)
+        positions_of_items = \
+                        self.nominal_perm_space._positions_of_sequence_items
+        n_times_taken = collections.Counter()
         new_perm_sequence = []
         for i in self._perm_sequence:
-            i_index = rapplied_sequence.index(i)
-            rapplied_sequence[i_index] = misc.MISSING_ELEMENT
-            new_perm_sequence.append(i_index)
+            new_perm_sequence.append(positions_of_items[i][n_times_taken[i]])
+            n_times_taken[i] += 1
         #                                                                     #
         ### Finished calculating the new perm sequence. #######################
         
@@ -268,30 +421,30 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.Sequence,
         assert not unrapplied.is_rapplied
         return unrapplied
     
-    undapplied = caching.CachedProperty(
+    undapplied = _PermCachedProperty(
         lambda self: type(self)(
             self._perm_sequence,
             self.nominal_perm_space.undapplied
-        ),
+        ) if self.is_dapplied else self,
         '''An undapplied version of this permutation.'''
         
     )
-    uncombinationed = caching.CachedProperty(
+    uncombinationed = _PermCachedProperty(
         lambda self: Perm(
             self._perm_sequence,
             self.nominal_perm_space.uncombinationed
-        ),
+        ) if self.is_combination else self,
         '''A non-combination version of this permutation.'''
         
     )
 
     def __getitem__(self, i):
-        if self.is_dapplied:
+        if self.nominal_perm_space.is_dapplied:
             try:
-                i_to_use = self.domain.index(i)
-            except TypeError:
-                # Some types, like `str`, annoyingly raise `TypeError` instead
-                # of `IndexError`.
+                i_to_use = self.nominal_perm_space._indices_of_domain_items[i]
+            except (KeyError, TypeError):
+                # (`TypeError` is for an unhashable `i`, which can't be in the
+                # domain either.)
                 raise IndexError
         else:
             i_to_use = i
@@ -346,20 +499,106 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.Sequence,
     __mul__ = lambda self, other: other.__rmul__(self)
     # (Must define this explicitly because of Python special-casing
     # multiplication of objects of the same type.)
+    
+    @classmethod
+    def compose_all(cls, perms, use_numpy=False, map_function=None):
+        '''
+        Compose a bunch of perms together, like `perms[0] * perms[1] * ...`.
+        
+        This is much faster than multiplying the perms one by one, because we
+        compose the raw perm sequences and create only one perm in the end. All
+        the perms must be of the same space, and it must not be rapplied,
+        dapplied or partial.
+        
+        Specify `use_numpy=True` to compose the perms as a NumPy array. This
+        might be faster for very long perms, but most of the time goes into
+        converting the perms to an array, so it isn't the default.
+        
+        Specify `map_function` to compose the perms in a divide-and-conquer
+        way: On each round, the perms are composed in pairs by calling
+        `map_function(function, left_perm_sequences, right_perm_sequences)`,
+        halving their number. If you pass in the `map` method of a
+        `concurrent.futures.Executor`, the pairs will be composed in parallel.
+        '''
+        perms = tuple(perms)
+        if not perms:
+            raise ValueError("Can't compose zero perms.")
+        nominal_perm_space = perms[0].nominal_perm_space
+        for perm in perms:
+            if not isinstance(perm, Perm) or \
+                        (perm.nominal_perm_space is not nominal_perm_space and
+                         perm.nominal_perm_space != nominal_perm_space):
+                raise ValueError("All perms must be of the same space.")
+        if nominal_perm_space.is_partial:
+            raise TypeError("Can't compose partial perms.")
+        if nominal_perm_space.is_rapplied:
+            raise TypeError("Can't compose rapplied perms.")
+        if nominal_perm_space.is_dapplied:
+            raise TypeError("Can't compose dapplied perms.")
+        
+        perm_sequences = [perm._perm_sequence for perm in perms]
+        
+        if map_function is not None:
+            while len(perm_sequences) >= 2:
+                n_pairs = len(perm_sequences) // 2
+                composed_perm_sequences = list(
+                    map_function(_compose_two_perm_sequences,
+                                 perm_sequences[0:2 * n_pairs:2],
+                                 perm_sequences[1:2 * n_pairs:2])
+                )
+                if len(perm_sequences) % 2:
+                    composed_perm_sequences.append(perm_sequences[-1])
+                perm_sequences = composed_perm_sequences
+            (perm_sequence,) = perm_sequences
+        elif use_numpy:
+            import numpy
+            perm_length = nominal_perm_space.sequence_length
+            array = numpy.fromiter(
+                (item for perm_sequence in perm_sequences for item in
+                                                                perm_sequence),
+                dtype=numpy.intp, count=len(perm_sequences) * perm_length
+            ).reshape(len(perm_sequences), perm_length)
+            composed_array = array[-1]
+            for row in array[-2::-1]:
+                composed_array = row[composed_array]
+            perm_sequence = composed_array.tolist()
+        else:
+            perm_sequence = perm_sequences[-1]
+            for left_perm_sequence in reversed(perm_sequences[:-1]):
+                perm_sequence = [left_perm_sequence[i] for i in perm_sequence]
+        
+        return type(perms[0])(perm_sequence, nominal_perm_space)
+    
             
     def __pow__(self, exponent):
-        '''Raise the perm by the power of `exponent`.'''
+        '''
+        Raise the perm by the power of `exponent`.
+        
+        This takes O(n) time no matter how big `exponent` is, because we rotate
+        each of the perm's cycles by `exponent` steps rather than multiply the
+        perm by itself again and again.
+        '''
         assert isinstance(exponent, numbers.Integral)
-        if exponent <= -1:
-            return self.inverse ** (- exponent)
-        elif exponent == 0:
+        if exponent == 0:
             return self.nominal_perm_space[0]
+        elif exponent == 1:
+            return self
+        elif self.is_partial or self.is_rapplied or self.is_dapplied:
+            if exponent <= -1:
+                return self.inverse ** (- exponent)
+            else:
+                return misc_tools.general_product((self,) * exponent)
         else:
-            assert exponent >= 1
-            return misc_tools.general_product((self,) * exponent)
+            perm_sequence = [None] * len(self._perm_sequence)
+            for cycle in self.cycles:
+                n_steps = exponent % len(cycle)
+                for item, target in zip(cycle,
+                                        cycle[n_steps:] + cycle[:n_steps]):
+                    perm_sequence[item] = target
+            return type(self)(perm_sequence, self.nominal_perm_space)
         
             
-    @caching.CachedProperty
+    @_PermCachedProperty
     def degree(self):
         '''
         The permutation's degree.
@@ -376,7 +615,7 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.Sequence,
             return len(self) - self.n_cycles
         
     
-    @caching.CachedProperty
+    @_PermCachedProperty
     def n_cycles(self):
         '''
         The number of cycles in this permutation.
@@ -387,24 +626,77 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.Sequence,
         '''
         if self.is_partial:
             return NotImplemented
+        return len(self.cycles)
+    
+    
+    @_PermCachedProperty
+    def cycles(self):
+        '''
+        The cycles of this permutation, as a tuple of tuples.
+        
+        Each cycle starts with its smallest item, and each item in it points at
+        the next one, with the last item pointing at the first. Items that
+        point at themselves are cycles of length 1. The cycles are ordered by
+        their first item.
+        
+        Example:
+        
+            >>> perm = PermSpace(5)[10]
+            >>> perm
+            <Perm: (0, 2, 4, 1, 3)>
+            >>> perm.cycles
+            ((0,), (1, 2, 4, 3))
+        
+        For rapplied or dapplied perms, these are the cycles of the unrapplied
+        and undapplied perm.
+        '''
+        if self.is_partial:
+            raise TypeError("Partial perms don't have cycles.")
         if self.is_rapplied:
-            return self.unrapplied.n_cycles
+            return self.unrapplied.cycles
         if self.is_dapplied:
-            return self.undapplied.n_cycles
+            return self.undapplied.cycles
+        
+        perm_sequence = self._perm_sequence
+        visited = [False] * len(perm_sequence)
+        cycles = []
+        for starting_item in range(len(perm_sequence)):
+            if visited[starting_item]:
+                continue
+            cycle = []
+            current_item = starting_item
+            while not visited[current_item]:
+                visited[current_item] = True
+                cycle.append(current_item)
+                current_item = perm_sequence[current_item]
+            cycles.append(tuple(cycle))
+        return tuple(cycles)
+    
+    
+    cycle_type = _PermCachedProperty(
+        lambda self: tuple(sorted(map(len, self.cycles), reverse=True)),
+        '''
+        The lengths of this permutation's cycles, from longest to shortest.
         
-        unvisited_items = set(self)
-        n_cycles = 0
-        while unvisited_items:
-            starting_item = current_item = next(iter(unvisited_items))
-            
-            while current_item in unvisited_items:
-                unvisited_items.remove(current_item)
-                current_item = self[current_item]
-                
-            if current_item == starting_item:
-                n_cycles += 1
-                
-        return n_cycles
+        Two permutations have the same cycle type if and only if they're
+        conjugates of each other.
+        '''
+    )
+    
+    order = _PermCachedProperty(
+        lambda self: functools.reduce(
+            lambda x, y: x * y // math.gcd(x, y),
+            set(map(len, self.cycles)),
+            1
+        ),
+        '''
+        The order of this permutation.
+        
+        This is the smallest positive number of times that we need to multiply
+        the permutation by itself to get the identity permutation. It's the
+        least common multiple of the lengths of its cycles.
+        '''
+    )
       
       
     def get_neighbors(self, *, degrees=(1,), perm_space=None):
@@ -417,6 +709,9 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.Sequence,
         sequence of integers to the `degrees` argument to get different degrees
         of relation. (e.g. specify `degrees=(1, 2)` to get both the closest
         neighbors and the second-closest neighbors.)
+        
+        The neighbors are computed lazily. See `iterate_neighbors` for more
+        options.
         '''
         from ..map_space import MapSpace
         if self.is_combination or self.is_recurrent or self.is_partial:
@@ -426,12 +721,143 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.Sequence,
         return MapSpace(
             perm_space.coerce_perm,
             nifty_collections.LazyTuple(
-                tuple(perm) for perm in PermSpace(
-                    self._perm_sequence,
-                    degrees=degrees
-                ) if tuple(perm) in perm_space
+                self.iterate_neighbors(degrees=degrees, perm_space=perm_space,
+                                       raw=True)
             )
         )
+    
+    
+    def iterate_neighbors(self, *, degrees=(1,), perm_space=None,
+                          shuffle=False, batch_size=None, raw=False):
+        '''
+        Iterate over the neighbor permutations of this permutation.
+        
+        This is like `get_neighbors`, except it returns an iterator. The
+        neighbors are made directly by switching items of this permutation, and
+        only the ones that are in `perm_space` are yielded. (It defaults to
+        this perm's space.) Checking that a neighbor obeys the fixed map and
+        degrees of the space is cheap; if the space is sliced, we have to find
+        the neighbor's index number in it, which is slower.
+        
+        The neighbors come in order of degree. Specify `shuffle=True` to get
+        them in random order instead. (This makes a list of all the candidate
+        switches in advance, but the neighbors themselves are still made
+        lazily.)
+        
+        Specify `batch_size` to get the neighbors in lists of that size, except
+        for the last list which may be shorter. If `raw=True` is given, the
+        neighbors are plain tuples instead of perms, like in
+        `PermSpace.iter_raw`.
+        '''
+        if self.is_combination or self.is_recurrent or self.is_partial:
+            raise NotImplementedError
+        if perm_space is None:
+            perm_space = self.nominal_perm_space
+        neighbors = self._iterate_neighbors(degrees, perm_space, shuffle, raw)
+        if batch_size is None:
+            return neighbors
+        if batch_size < 1:
+            raise ValueError('`batch_size` must be positive.')
+        return self._iterate_neighbor_batches(neighbors, batch_size)
+    
+    
+    def _iterate_neighbors(self, degrees, perm_space, shuffle, raw):
+        perm_sequence = self._perm_sequence
+        length = len(perm_sequence)
+        degrees = sequence_tools.to_tuple(degrees, item_type=int)
+        if not degrees:
+            degrees = range(length)
+        degrees = sorted(set(degree for degree in degrees if
+                             0 <= degree < max(length, 1)))
+        
+        if perm_space.is_partial or perm_space.is_combination or \
+                                    perm_space.sequence_length != length or \
+                                 perm_space._sequence_set != set(perm_sequence):
+            # The space is too different from this perm's space for the cheap
+            # checks below, so we check each neighbor the slow way:
+            positions = range(length)
+            fixed_pairs = ()
+            neighbor_degrees = None
+            use_index = True
+        else:
+            domain_indices = dict(
+                (key, i) for i, key in enumerate(perm_space.domain)
+            )
+            fixed_pairs = tuple(
+                (domain_indices[key], value) for key, value in
+                                                   perm_space.fixed_map.items()
+            )
+            if all(perm_sequence[i] == value for i, value in fixed_pairs):
+                # This perm obeys the fixed map, so its neighbors obey it if
+                # and only if they don't move the fixed items.
+                fixed_indices = set(i for i, value in fixed_pairs)
+                positions = [i for i in range(length) if i not in
+                                                                fixed_indices]
+                fixed_pairs = ()
+            else:
+                positions = range(length)
+            if perm_space.is_degreed:
+                neighbor_degrees = set(perm_space.degrees)
+                sequence_indices = dict(
+                    (value, i) for i, value in enumerate(perm_space.sequence)
+                )
+                pure_perm_sequence = [sequence_indices[value] for value in
+                                                                 perm_sequence]
+                # Switching two items splits their cycle if they're in the same
+                # one, lowering the degree by one, and otherwise merges their
+                # cycles, raising the degree by one.
+                cycle_labels = [None] * length
+                for i in range(length):
+                    j = i
+                    while cycle_labels[j] is None:
+                        cycle_labels[j] = i
+                        j = pure_perm_sequence[j]
+                degree = length - len(set(cycle_labels))
+            else:
+                neighbor_degrees = None
+            use_index = perm_space.is_sliced
+            
+        all_swaps = (swaps for n_swaps in degrees for swaps in
+                                            _iterate_swaps(positions, n_swaps))
+        if shuffle:
+            all_swaps = list(all_swaps)
+            random.shuffle(all_swaps)
+        
+        for swaps in all_swaps:
+            neighbor = list(perm_sequence)
+            for a, b in swaps:
+                neighbor[a], neighbor[b] = neighbor[b], neighbor[a]
+            if fixed_pairs and any(neighbor[i] != value for i, value in
+                                                                  fixed_pairs):
+                continue
+            if neighbor_degrees is not None:
+                if len(swaps) == 1:
+                    ((a, b),) = swaps
+                    neighbor_degree = degree - 1 if \
+                         cycle_labels[a] == cycle_labels[b] else degree + 1
+                else:
+                    neighbor_degree = length - _count_cycles(
+                        [sequence_indices[value] for value in neighbor]
+                    )
+                if neighbor_degree not in neighbor_degrees:
+                    continue
+            neighbor = tuple(neighbor)
+            if use_index and neighbor not in perm_space:
+                continue
+            yield neighbor if raw else perm_space.coerce_perm(neighbor)
+            
+            
+    @staticmethod
+    def _iterate_neighbor_batches(neighbors, batch_size):
+        '''Group `neighbors` into lists of `batch_size`.'''
+        batch = []
+        for neighbor in neighbors:
+            batch.append(neighbor)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
         
         
     def __lt__(self, other):
@@ -444,12 +870,13 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.Sequence,
     __reversed__ = lambda self: type(self)(reversed(self._perm_sequence),
                                            self.nominal_perm_space)
     
-    items = caching.CachedProperty(PermItems)
-    as_dictoid = caching.CachedProperty(PermAsDictoid)
+    items = _PermCachedProperty(PermItems)
+    as_dictoid = _PermCachedProperty(PermAsDictoid)
     
 
 class UnrecurrentedMixin:
     '''Mixin for a permutation in a space that's been unrecurrented.'''
+    __slots__ = ()
     def __getitem__(self, i):
         return super().__getitem__(i)[1]
     def __iter__(self):
@@ -462,9 +889,10 @@ class UnrecurrentedMixin:
     
 class UnrecurrentedPerm(UnrecurrentedMixin, Perm):
     '''A permutation in a space that's been unrecurrented.'''
+    __slots__ = ()
         
         
 
-from .perm_space import PermSpace
+from .perm_space import PermSpace, _get_registered_perm_space
 from .comb_space import CombSpace
 from .comb import Comb
@@ -5,9 +5,12 @@ import collections
 import abc
 import functools
 import types
-import math
 import numbers
 import inspect
+import operator
+import hashlib
+import pickle
+import weakref
 
 from combi._python_toolbox import caching
 from combi._python_toolbox import math_tools
@@ -19,23 +22,65 @@ from combi._python_toolbox import misc_tools
 
 from .. import misc
 from . import variations
+from . import combinadic
+from . import interning
 from .calculating_length import * 
 from .variations import UnallowedVariationSelectionException
 from ._variation_removing_mixin import _VariationRemovingMixin
 from ._variation_adding_mixin import _VariationAddingMixin
 from ._fixed_map_managing_mixin import _FixedMapManagingMixin
+from ._iterating_mixin import _IteratingMixin
+from ._ranking_mixin import _RankingMixin
+from ._sampling_mixin import _SamplingMixin
 
 infinity = float('inf')
 
 
+def _is_range(sequence, length):
+    '''
+    Is `sequence` equal to `range(length)`?
+    
+    This is like `cute_iter_tools.are_equal`, but much faster for long
+    sequences.
+    '''
+    if isinstance(sequence, sequence_tools.CuteRange):
+        return sequence == sequence_tools.CuteRange(length)
+    return len(sequence) == length and \
+                                all(map(operator.eq, sequence, range(length)))
+
+
+def _is_in(item, items):
+    '''Is `item` in `items`? Unhashable items aren't in a set.'''
+    try:
+        return item in items
+    except TypeError:
+        return False
+
+
 class PermSpaceType(abc.ABCMeta):
     '''
     Metaclass for `PermSpace` and `CombSpace`.
     
     The functionality provided is: If someone tries to instantiate `PermSpace`
     while specifying `is_combination=True`, we automatically use `CombSpace`.
+    Also, if there's an `interning_table` on the class, equal spaces are
+    shared. (See the `interning` module.)
     '''
     def __call__(cls, *args, **kwargs):
+        interning_table = cls.interning_table
+        if interning_table is None:
+            return cls._create_uninterned(*args, **kwargs)
+        key = interning.get_interning_key(cls, args, kwargs)
+        if key is None:
+            return cls._create_uninterned(*args, **kwargs)
+        perm_space = interning_table.get(key)
+        if perm_space is None:
+            perm_space = cls._create_uninterned(*args, **kwargs)
+            interning_table[key] = perm_space
+        return perm_space
+        
+    def _create_uninterned(cls, *args, **kwargs):
+        '''Create a space without looking in the interning table.'''
         if cls == PermSpace and kwargs.get('is_combination', False):
             from .comb_space import CombSpace
             arguments = PermSpace.__init__.signature.bind(
@@ -58,8 +103,10 @@ class PermSpaceType(abc.ABCMeta):
         
         
 class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
-                _FixedMapManagingMixin, sequence_tools.CuteSequenceMixin,
-                collections.Sequence, metaclass=PermSpaceType):
+                _FixedMapManagingMixin, _IteratingMixin, _RankingMixin,
+                _SamplingMixin, sequence_tools.CuteSequenceMixin,
+                collections.Sequence,
+                metaclass=PermSpaceType):
     '''
     A space of permutations on a sequence.
     
@@ -149,6 +196,14 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
     A perm space that has none of these variations is called pure.
     '''
     
+    interning_table = None
+    '''
+    An `interning.InterningTable` for sharing equal spaces, or `None`.
+    
+    Set this to share spaces that are created with equal arguments instead of
+    creating them again. This is off by default.
+    '''
+    
     @classmethod
     def coerce(cls, argument):
         '''Make `argument` into something of class `cls` if it isn't.'''
@@ -189,13 +244,9 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
             assert isinstance(iterable_or_length, collections.Iterable)
             self.sequence = sequence_tools. \
                       ensure_iterable_is_immutable_sequence(iterable_or_length)
-            range_candidate = sequence_tools.CuteRange(len(self.sequence))
-            
-            self.is_rapplied = not (
-                cute_iter_tools.are_equal(self.sequence,
-                                              range_candidate)
-            )
             self.sequence_length = len(self.sequence)
+            self.is_rapplied = not _is_range(self.sequence,
+                                             self.sequence_length)
             if not self.is_rapplied:
                 self.sequence = sequence_tools.CuteRange(self.sequence_length)
         
@@ -204,11 +255,9 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         
         ### Figuring out whether sequence is recurrent: #######################
         #                                                                     #
-        if self.is_rapplied:
-            self.is_recurrent = any(count >= 2 for count in
-                                    self._frozen_ordered_bag.values())
-        else:
+        if not self.is_rapplied:
             self.is_recurrent = False
+        # (Otherwise `is_recurrent` is calculated when it's first needed.)
         #                                                                     #
         ### Finished figuring out whether sequence is recurrent. ##############
         
@@ -239,14 +288,13 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         ### Figuring out whether space is dapplied: ###########################
         #                                                                     #
         if domain is None:
-            domain = self.indices
-        domain = \
+            self.is_dapplied = False
+        else:
+            domain = \
                sequence_tools.ensure_iterable_is_immutable_sequence(domain)
-        if self.is_partial:
-            domain = domain[:self.n_elements]
-        self.is_dapplied = not cute_iter_tools.are_equal(
-            domain, self.indices
-        )
+            if self.is_partial:
+                domain = domain[:self.n_elements]
+            self.is_dapplied = not _is_range(domain, self.n_elements)
         if self.is_dapplied:
             if self.is_combination:
                 raise UnallowedVariationSelectionException(
@@ -255,7 +303,8 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
                 )
 
             self.domain = domain
-            if len(set(self.domain)) < len(self.domain):
+            domain_set = set(self.domain)
+            if len(domain_set) < len(self.domain):
                 raise Exception('The domain must not have repeating elements.')
         else:
             self.domain = self.indices
@@ -273,9 +322,14 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
             else:
                 fixed_map = dict(fixed_map) 
         if fixed_map:
+            # Checking with sets and `range`s, because checking `in` a long
+            # tuple would go over the whole tuple for each key.
+            keys = domain_set if self.is_dapplied else range(self.n_elements)
+            values = self._sequence_set if self.is_rapplied else \
+                                                   range(self.sequence_length)
             self.fixed_map = {key: value for (key, value) in
-                              fixed_map.items() if (key in self.domain) and
-                              (value in self.sequence)}
+                              fixed_map.items() if (key in keys) and
+                              _is_in(value, values)}
                 
         else:
             (self.fixed_map, self.free_indices, self.free_keys,
@@ -310,11 +364,11 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         ### Figuring out degrees: #############################################
         #                                                                     #
         all_degrees = sequence_tools.CuteRange(self.sequence_length)
-        if degrees is None:
+        if degrees is None or degrees == all_degrees:
             degrees = ()
         degrees = sequence_tools.to_tuple(degrees, item_type=int)
         
-        if (not degrees) or cute_iter_tools.are_equal(degrees, all_degrees):
+        if (not degrees) or _is_range(degrees, self.sequence_length):
             self.is_degreed = False
             self.degrees = all_degrees
         else:
@@ -346,15 +400,12 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         ### Figuring out slice and length: ####################################
         #                                                                     #
         self.slice_ = slice_
-        self.canonical_slice = sequence_tools.CanonicalSlice(
-            slice_ or slice(float('inf')),
-            self._unsliced_length
-        )
-        self.length = max(
-            self.canonical_slice.stop - self.canonical_slice.start,
-            0
-        )
-        self.is_sliced = (self.length != self._unsliced_length)
+        if slice_ is None:
+            # (`length` and `canonical_slice` are calculated when they're
+            # first needed, because calculating the length can take a while.)
+            self.is_sliced = False
+        else:
+            self.is_sliced = (self.length != self._unsliced_length)
         #                                                                     #
         ### Finished figuring out slice and length. ###########################
         
@@ -376,8 +427,6 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
             self.purified = self
         if not self.is_rapplied:
             self.unrapplied = self
-        if not self.is_recurrent:
-            self.unrecurrented = self
         if not self.is_partial:
             self.unpartialled = self
         if not self.is_combination:
@@ -393,6 +442,27 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
             self.untyped = self
 
     __init__.signature = inspect.signature(__init__)
+    
+    is_recurrent = caching.CachedProperty(
+        lambda self: len(self._sequence_set) < self.sequence_length,
+        '''Whether any item appears more than once in the sequence.'''
+    )
+    
+    canonical_slice = caching.CachedProperty(
+        lambda self: sequence_tools.CanonicalSlice(
+            self.slice_ or slice(float('inf')),
+            self._unsliced_length
+        ),
+        '''The slice of this space, with its start and stop worked out.'''
+    )
+    
+    length = caching.CachedProperty(
+        lambda self: max(
+            self.canonical_slice.stop - self.canonical_slice.start,
+            0
+        ),
+        '''The number of perms in this space.'''
+    )
             
     @caching.CachedProperty
     def _unsliced_length(self):
@@ -407,12 +477,14 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         if self.is_degreed:
             assert not self.is_recurrent and not self.is_partial and \
                                                         not self.is_combination
+            n_free_items = self.sequence_length - len(self.fixed_map)
+            stirling_row = math_tools.stirling_table.row(n_free_items)
             return sum(
-                math_tools.abs_stirling(
-                    self.sequence_length - len(self.fixed_map),
+                stirling_row[n_cycles] for n_cycles in (
                     self.sequence_length - degree -
-                                    self._n_cycles_in_fixed_items_of_just_fixed
-                ) for degree in self.degrees
+                    self._n_cycles_in_fixed_items_of_just_fixed for degree in
+                                                                  self.degrees
+                ) if 0 <= n_cycles <= n_free_items
             )
         elif self.is_fixed:
             assert not self.is_degreed and not self.is_combination
@@ -453,6 +525,33 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
                 # This division is always without a remainder, because math.
             
             
+    @caching.CachedProperty
+    def _degreed_length_table(self):
+        '''
+        Table of the numbers of ways to complete partial perms of this space.
+        
+        `self._degreed_length_table[n_free_items][n_cycles]` is the number of
+        perms in this degreed space that extend a partial perm that has
+        `n_free_items` items without a value, and `n_cycles` cycles already
+        closed in the items that do have a value. This is used in
+        `__getitem__`, `index` and iteration, so we don't have to sum Stirling
+        numbers over all degrees for every candidate value.
+        '''
+        assert self.is_degreed
+        stirling_table = math_tools.stirling_table
+        stirling_table.precompute(self.sequence_length)
+        length_table = []
+        for n_free_items in range(self.sequence_length + 1):
+            stirling_row = stirling_table.row(n_free_items)
+            length_table.append(tuple(
+                sum(stirling_row[self.sequence_length - degree - n_cycles]
+                    for degree in self.degrees if 0 <=
+                    self.sequence_length - degree - n_cycles <= n_free_items)
+                for n_cycles in range(self.sequence_length + 1)
+            ))
+        return tuple(length_table)
+    
+            
     @caching.CachedProperty
     def variation_selection(self):
         '''
@@ -580,39 +679,25 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
             for j in self.sequence:
                 if j in wip_perm_sequence_dict:
                     continue
+                n_free_items = self.sequence_length - \
+                                             len(wip_perm_sequence_dict) - 1
                 for unused_value in available_values:
-                    candidate_perm_sequence_dict = dict(wip_perm_sequence_dict)
-                    candidate_perm_sequence_dict[j] = unused_value
                     
                     ### Checking whether we closed a cycle: ###################
                     #                                                         #
-                    if j == unused_value:
-                        closed_cycle = True
-                    else:
-                        current = j
-                        while True:
-                            current = candidate_perm_sequence_dict[current]
-                            if current == j:
-                                closed_cycle = True
-                                break
-                            elif current not in candidate_perm_sequence_dict:
-                                closed_cycle = False
-                                break
+                    current = unused_value
+                    while current in wip_perm_sequence_dict:
+                        current = wip_perm_sequence_dict[current]
+                    closed_cycle = (current == j)
                     #                                                         #
                     ### Finished checking whether we closed a cycle. ##########
                     
                     candidate_n_cycles_in_fixed_items = \
                                      wip_n_cycles_in_fixed_items + closed_cycle
                     
-                    candidate_fixed_perm_space_length = sum(
-                        math_tools.abs_stirling(
-                            self.sequence_length -
-                                             len(candidate_perm_sequence_dict),
-                            self.sequence_length - degree -
-                                              candidate_n_cycles_in_fixed_items
-                        ) for degree in self.degrees
-                    )
-                    
+                    candidate_fixed_perm_space_length = \
+                        self._degreed_length_table[n_free_items][
+                                             candidate_n_cycles_in_fixed_items]
                     
                     if wip_i < candidate_fixed_perm_space_length:
                         available_values.remove(unused_value)
@@ -691,36 +776,30 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         
         #######################################################################
         elif self.is_combination:
-            wip_number = self.length - 1 - i
-            wip_perm_sequence = []
-            for i in range(self.n_elements, 0, -1):
-                for j in range(self.sequence_length, i - 2, -1):
-                    candidate = math_tools.binomial(j, i)
-                    if candidate <= wip_number:
-                        wip_perm_sequence.append(
-                            self.sequence[-(j+1)]
-                        )
-                        wip_number -= candidate
-                        break
-                else:
-                    raise RuntimeError
-            result = tuple(wip_perm_sequence)
+            result = tuple(
+                self.sequence[j] for j in combinadic.unrank_combination(
+                    i, self.sequence_length, self.n_elements
+                )
+            )
             assert len(result) == self.n_elements
             return self.perm_type(result, self)
 
         
         #######################################################################
         else:
-            factoradic_number = math_tools.to_factoradic(
-                i * math.factorial(
-                     self.n_unused_elements),
-                n_digits_pad=self.sequence_length
-            )
-            if self.is_partial:
-                factoradic_number = factoradic_number[:-self.n_unused_elements]
-            unused_numbers = list(self.sequence)
-            result = tuple(unused_numbers.pop(factoradic_digit) for
-                                         factoradic_digit in factoradic_number)
+            # Getting the digits of `i` in the mixed radix where each digit's
+            # base is the number of items to choose from at its position,
+            # starting from the last position. This saves us from going
+            # through a factoradic number with big factorials.
+            digits = []
+            wip_number = i
+            for n_choices in range(self.n_unused_elements + 1,
+                                   self.sequence_length + 1):
+                wip_number, digit = divmod(wip_number, n_choices)
+                digits.append(digit)
+            unused_values = list(self._sequence_tuple)
+            result = tuple(unused_values.pop(digit) for digit in
+                                                             reversed(digits))
             assert sequence_tools.get_length(result) == self.n_elements
             return self.perm_type(result, self)
                 
@@ -734,8 +813,6 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         '''In partial perm spaces, number of elements that aren't used.'''
     )
     
-    __iter__ = lambda self: (self[i] for i in
-                                         sequence_tools.CuteRange(self.length))
     _reduced = property(
         lambda self: (
             type(self), self.sequence, self.domain, 
@@ -768,7 +845,7 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         
         perm_set = set(perm) if not isinstance(perm, UnrecurrentedPerm) \
                                                   else set(perm._perm_sequence)
-        if not (perm_set <= set(self.sequence)):
+        if not (perm_set <= self._sequence_set):
             raise ValueError
         
         if sequence_tools.get_length(perm) != self.n_elements:
@@ -792,26 +869,9 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         
         #######################################################################
         elif self.is_degreed:
-            if perm.is_rapplied: return self.unrapplied.index(perm.unrapplied)
-            wip_perm_number = 0
-            wip_perm_sequence_dict = dict(self.fixed_map)
-            unused_values = list(self.free_values)
-            for i, value in enumerate(perm._perm_sequence):
-                if i in self.fixed_indices:
-                    continue
-                unused_values.remove(value)
-                lower_values = [j for j in unused_values if j < value]
-                for lower_value in lower_values:
-                    temp_fixed_map = dict(wip_perm_sequence_dict)
-                    temp_fixed_map[i] = lower_value
-                    wip_perm_number += PermSpace(
-                        self.sequence_length, degrees=self.degrees,
-                        fixed_map=temp_fixed_map
-                    ).length
-                    
-                wip_perm_sequence_dict[self.domain[i]] = value
-                
-            perm_number = wip_perm_number
+            perm_number = self._perm_sequence_ranker(perm._perm_sequence)
+            if perm_number is None:
+                raise ValueError
             
         #######################################################################
         elif self.is_recurrent:
@@ -892,28 +952,14 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
             if not cute_iter_tools.is_sorted(perm._perm_sequence):
                 raise ValueError
             
-            processed_perm_sequence = tuple(
-                self.sequence_length - 1 -
-                                     item for item in perm._perm_sequence[::-1]
-            )
-            perm_number = self.unsliced.length - 1 - sum(
-                (math_tools.binomial(item, i) for i, item in
-                                  enumerate(processed_perm_sequence, start=1)),
-                0
-            )
+            perm_number = combinadic.rank_combination(perm._perm_sequence,
+                                                      self.sequence_length)
               
         #######################################################################
         else:
-            factoradic_number = []
-            unused_values = list(self.sequence)
-            for i, value in enumerate(perm._perm_sequence):
-                index_of_current_number = unused_values.index(value)
-                factoradic_number.append(index_of_current_number)
-                unused_values.remove(value)
-            perm_number = math_tools.from_factoradic(
-                factoradic_number +
-                [0] * self.n_unused_elements
-            ) // math.factorial(self.n_unused_elements)
+            perm_number = self._perm_sequence_ranker(perm._perm_sequence)
+            if perm_number is None:
+                raise ValueError
             
             
         #######################################################################
@@ -942,19 +988,111 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         '''The set of items in this space's domain.'''
     )
     
+    _sequence_tuple = caching.CachedProperty(
+        lambda self: tuple(self.sequence),
+        '''This space's sequence as a tuple, which is quick to copy.'''
+    )
+    
+    _sequence_set = caching.CachedProperty(
+        lambda self: set(self.sequence),
+        '''The set of items in this space's sequence.'''
+    )
+    
+    @caching.CachedProperty
+    def _positions_of_sequence_items(self):
+        '''
+        Map from each item in the sequence to the index numbers where it is.
         
-    def __reduce__(self, *args, **kwargs):
-        #######################################################################
-        #                                                                     #
-        self._just_fixed
-        # (Getting this generated because we can't save a lambda.)
-        try:
-            del self._get_just_fixed
-        except AttributeError:
-            pass
-        #                                                                     #
-        #######################################################################
-        return super().__reduce__(*args, **kwargs)
+        The index numbers are in a tuple in ascending order; there's more than
+        one only in recurrent spaces. This is shared by all the perms of the
+        space, so they can look up items without going over the sequence.
+        '''
+        positions_of_sequence_items = {}
+        for i, item in enumerate(self.sequence):
+            positions_of_sequence_items.setdefault(item, []).append(i)
+        return dict((item, tuple(positions)) for item, positions in
+                                         positions_of_sequence_items.items())
+    
+    _indices_of_domain_items = caching.CachedProperty(
+        lambda self: dict((key, i) for i, key in enumerate(self.domain)),
+        '''Map from each item in the domain to its index number.'''
+    )
+    
+    def _get_index_of_domain_item(self, key):
+        '''Get the index number of `key` in the domain.'''
+        if self.is_dapplied:
+            return self._indices_of_domain_items[key]
+        else:
+            return self.domain.index(key)
+    
+        
+    @property
+    def _compact_arguments(self):
+        '''
+        The arguments for creating this space, without anything derived.
+        
+        This is what we pickle for a `PermSpace`, instead of its `__dict__`
+        with all of its cached spaces. The fixed items are in the order of the
+        domain, because the keys might not be comparable with each other.
+        '''
+        fixed_items = tuple((key, self.fixed_map[key]) for key in self.domain
+                            if key in self.fixed_map)
+        return (
+            type(self),
+            self.sequence if self.is_rapplied else self.sequence_length,
+            self.n_elements,
+            self.domain if self.is_dapplied else None,
+            fixed_items if self.is_fixed else None,
+            self.degrees if self.is_degreed else None,
+            self.canonical_slice if self.is_sliced else None,
+            self.perm_type if self.is_typed else None,
+            self.prefix,
+        )
+    
+    @caching.CachedProperty
+    def _pickling_digest(self):
+        '''
+        A digest of `_compact_arguments` that's the same in every process.
+        
+        Perms of a space that's registered for pickling are pickled with this
+        digest instead of the space.
+        '''
+        return _get_pickling_digest(self._compact_arguments)
+    
+    def __reduce__(self):
+        return (_get_perm_space_from_compact_arguments,
+                (self._compact_arguments, self.is_registered_for_pickling))
+    
+    def register_for_pickling(self):
+        '''
+        Pickle perms of this space with a short reference to the space.
+        
+        Usually every perm that's pickled on its own carries its space with
+        it, which for a space with a long sequence is most of the pickle. Once
+        a space is registered, its perms refer to it by a digest of 20 bytes
+        instead, and unpickling them gives perms of the space that's
+        registered in the unpickling process.
+        
+        Unpickling a registered space registers it in the unpickling process
+        as well, so send the space itself to the other process once, e.g. to
+        the initializer of a `multiprocessing.Pool`, and then send its perms.
+        Unpickling a perm of a space that isn't known to the process raises
+        `LookupError`.
+        
+        The space is held until `unregister_for_pickling` is called.
+        '''
+        pickling_digest = self._pickling_digest
+        _perm_spaces_by_pickling_digest[pickling_digest] = self
+        _registered_perm_spaces[pickling_digest] = self
+    
+    def unregister_for_pickling(self):
+        '''Stop pickling perms of this space with a reference to it.'''
+        _registered_perm_spaces.pop(self._pickling_digest, None)
+    
+    is_registered_for_pickling = property(
+        lambda self: self._pickling_digest in _registered_perm_spaces,
+        doc='''Whether this space is registered for pickling.'''
+    )
         
         
     def coerce_perm(self, perm):
@@ -1005,7 +1143,8 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         fixed_map = {key - len(prefix): value
                                            for key, value in fixed_map.items()}
         
-        perm_space = cls(
+        # (Not interning this space because we're setting its prefix.)
+        perm_space = cls._create_uninterned(
             sequence, n_elements=n_elements, fixed_map=fixed_map, 
             is_combination=is_combination, slice_=slice_,
             perm_type=perm_type
@@ -1016,13 +1155,111 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         
         
 
+_perm_spaces_by_pickling_digest = weakref.WeakValueDictionary()
+'''
+The spaces in this process that perms may be unpickled into, by digest.
+
+These are the spaces that were unpickled or registered for pickling. When many
+perms of the same space are unpickled, they all get the same space object
+instead of a new copy each.
+'''
+
+_registered_perm_spaces = {}
+'''The spaces registered for pickling, by digest.'''
+
+
+def _get_typed_item_for_digest(item):
+    '''
+    Get a picklable version of `item` that includes the type of every item.
+    
+    This is like `interning._get_typed_item`, except types are given by name,
+    because some types, like `NoneType` on Python 2, can't be pickled.
+    '''
+    item_type = type(item)
+    type_name = '%s.%s' % (item_type.__module__, item_type.__name__)
+    if isinstance(item, tuple):
+        return (type_name, tuple(map(_get_typed_item_for_digest, item)))
+    elif isinstance(item, sequence_tools.CanonicalSlice):
+        return (type_name, tuple(item))
+    else:
+        return (type_name, item)
+
+
+def _get_pickling_digest(compact_arguments):
+    '''
+    Get a digest of the `_compact_arguments` of a space.
+    
+    The type of every item is included, so items that are equal but of
+    different types, like `1` and `True`, give different digests.
+    '''
+    return hashlib.sha1(pickle.dumps(
+        _get_typed_item_for_digest(compact_arguments), protocol=2
+    )).digest()
+
+
+def _get_registered_perm_space(pickling_digest):
+    '''Get the space in this process that has `pickling_digest`.'''
+    try:
+        return _perm_spaces_by_pickling_digest[pickling_digest]
+    except KeyError:
+        raise LookupError(
+            "Can't unpickle the perm, because its space isn't known to this "
+            "process. Unpickle the space first, after calling "
+            "`.register_for_pickling()` on it."
+        )
+
+
+def _get_perm_space_from_compact_arguments(compact_arguments,
+                                           register_for_pickling=False):
+    '''
+    Make a `PermSpace` from its `_compact_arguments`.
+    
+    If an equal space was unpickled or registered in this process, that space
+    is returned instead.
+    '''
+    pickling_digest = _get_pickling_digest(compact_arguments)
+    perm_space = _perm_spaces_by_pickling_digest.get(pickling_digest)
+    if perm_space is None:
+        perm_space = _create_perm_space_from_compact_arguments(
+                                                             compact_arguments)
+        perm_space._pickling_digest = pickling_digest
+        _perm_spaces_by_pickling_digest[pickling_digest] = perm_space
+    if register_for_pickling:
+        perm_space.register_for_pickling()
+    return perm_space
+
+
+def _create_perm_space_from_compact_arguments(compact_arguments):
+    '''Create a new `PermSpace` from its `_compact_arguments`.'''
+    from .comb_space import CombSpace
+    (perm_space_type, iterable_or_length, n_elements, domain, fixed_items,
+               degrees, slice_, perm_type, prefix) = compact_arguments
+    # (A space with a prefix mustn't be shared with the `interning_table`.)
+    create = perm_space_type if prefix is None else \
+                                           perm_space_type._create_uninterned
+    if issubclass(perm_space_type, CombSpace):
+        perm_space = create(iterable_or_length, n_elements, slice_=slice_,
+                            perm_type=perm_type)
+    else:
+        perm_space = create(
+            iterable_or_length, n_elements, domain=domain,
+            fixed_map=None if fixed_items is None else dict(fixed_items),
+            degrees=degrees, slice_=slice_, perm_type=perm_type
+        )
+    if prefix is not None:
+        perm_space.prefix = prefix
+    return perm_space
+
+
 from .perm import Perm, UnrecurrentedPerm
 from . import _variation_removing_mixin
 from . import _variation_adding_mixin
 from . import _fixed_map_managing_mixin
+from . import _ranking_mixin
 
 # Must set these after-the-fact because of import loop:
 PermSpace.perm_type = PermSpace.default_perm_type = Perm
 _variation_removing_mixin.PermSpace = PermSpace
 _variation_adding_mixin.PermSpace = PermSpace
-_fixed_map_managing_mixin.PermSpace = PermSpace
\ No newline at end of file
+_fixed_map_managing_mixin.PermSpace = PermSpace
+_ranking_mixin.UnrecurrentedPerm = UnrecurrentedPerm
\ No newline at end of file
@@ -2,6 +2,7 @@
 # This program is distributed under the MIT license.
 
 import collections
+import operator
 
 from combi._python_toolbox import math_tools
 from combi._python_toolbox import sequence_tools
@@ -63,6 +64,58 @@ class ProductSpace(sequence_tools.CuteSequenceMixin, collections.Sequence):
                      zip(self.sequences, reversed(reverse_indices)))
     
         
+    def get_many(self, indices):
+        '''
+        Get the items with the given index numbers.
+        
+        This is like `[product_space[i] for i in indices]`, except the index
+        numbers are checked and split into digits in one go.
+        '''
+        length = self.length
+        reversed_sequences = tuple(reversed(self.sequences))
+        reversed_sequence_lengths = tuple(reversed(self.sequence_lengths))
+        items = []
+        for i in indices:
+            i = operator.index(i)
+            if i < 0:
+                i += length
+            if not (0 <= i < length):
+                raise IndexError
+            reverse_item = []
+            for sequence, sequence_length in zip(reversed_sequences,
+                                                 reversed_sequence_lengths):
+                i, current_index = divmod(i, sequence_length)
+                reverse_item.append(sequence[current_index])
+            items.append(tuple(reversed(reverse_item)))
+        return items
+    
+        
+    def to_array(self, start=None, stop=None):
+        '''
+        Get the items from `start` to `stop` as a 2-D NumPy array.
+        
+        The array has a row for each item that would be in
+        `tuple(product_space)[start:stop]`, with the index of each of the
+        item's members in its sequence. If the space is too big for NumPy's
+        integers, the array holds Python integers. This method requires NumPy,
+        though Combi itself doesn't.
+        '''
+        import numpy
+        canonical_slice = sequence_tools.CanonicalSlice(slice(start, stop),
+                                                        self.length)
+        dtype = numpy.int64 if self.length <= numpy.iinfo(numpy.int64).max \
+                                                                    else object
+        wip_numbers = numpy.array(
+            range(canonical_slice.start, canonical_slice.stop), dtype=dtype
+        )
+        array = numpy.zeros((len(wip_numbers), len(self.sequences)),
+                            dtype=dtype)
+        for i in reversed(range(len(self.sequences))):
+            array[:, i] = wip_numbers % self.sequence_lengths[i]
+            wip_numbers //= self.sequence_lengths[i]
+        return array
+    
+    
     _reduced = property(lambda self: (type(self), self.sequences))
     __hash__ = lambda self: hash(self._reduced)
     __eq__ = lambda self, other: (isinstance(other, ProductSpace) and
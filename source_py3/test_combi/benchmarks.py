@@ -0,0 +1,292 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Benchmarks for `combi`'s spaces.
+
+Run them with:
+    
+    python -m test_combi.benchmarks
+
+This measures index access, `index`, iteration and length calculation on a
+`PermSpace` of every allowed variation selection, on the other spaces in
+`combi`, and on both engines of the recurrent length calculators, at several
+sizes. It also measures creating a `PermSpace` on a long sequence. Every
+measurement is written as one line of JSON, so results from
+different releases can be saved and compared. Run with `--help` to see the
+options.
+'''
+
+import sys
+import json
+import timeit
+import argparse
+import itertools
+import platform
+
+import combi
+from combi import *
+from combi._python_toolbox import nifty_collections
+from combi.perming import calculating_length
+from combi.perming import variations
+
+
+default_sizes = (5, 8, 11)
+'''The sizes of the spaces benchmarked by default.'''
+
+quick_sizes = (4, 6)
+'''The sizes of the spaces benchmarked with `--quick`.'''
+
+
+class BenchmarkPerm(Perm):
+    '''Perm type used for benchmarking typed perm spaces.'''
+
+class BenchmarkComb(Comb):
+    '''Comb type used for benchmarking typed comb spaces.'''
+
+
+def time_function(function, min_time=0.1, n_repeats=3):
+    '''
+    Get the number of seconds that a call to `function` takes.
+    
+    `function` is called again and again until at least `min_time` seconds
+    have passed, and this is repeated `n_repeats` times. The fastest of the
+    repeats is used, because the slower ones were probably slowed down by
+    something other than `function`. Returns `(n_calls, seconds_per_call)`.
+    '''
+    timer = timeit.Timer(function)
+    n_calls = 1
+    while True:
+        seconds = timer.timeit(n_calls)
+        if seconds >= min_time / n_repeats:
+            break
+        n_calls *= 2 if seconds * 10 >= min_time / n_repeats else 10
+    best_seconds = min(
+        [seconds] + timer.repeat(repeat=n_repeats - 1, number=n_calls)
+    )
+    return n_calls, best_seconds / n_calls
+
+
+def get_variation_selection_name(variation_selection):
+    '''Get a name like "rapplied+partial" for a `VariationSelection`.'''
+    return '+'.join(variation.value for variation in
+                                     variation_selection.variations) or 'pure'
+
+
+def make_perm_space(variation_selection, size):
+    '''
+    Make a `PermSpace` with the variations of `variation_selection`.
+    
+    `size` is the length of the space's sequence.
+    '''
+    assert variation_selection.is_allowed
+    assert size >= 4
+    kwargs = {}
+    if variation_selection.is_recurrent:
+        sequence = tuple(i // 2 for i in range(size))
+        kwargs['iterable_or_length'] = sequence
+    elif variation_selection.is_rapplied:
+        sequence = tuple(range(size, 2 * size))
+        kwargs['iterable_or_length'] = sequence
+    else:
+        sequence = tuple(range(size))
+        kwargs['iterable_or_length'] = size
+    if variation_selection.is_dapplied:
+        kwargs['domain'] = domain = tuple('d%s' % i for i in range(size))
+    else:
+        domain = tuple(range(size))
+    if variation_selection.is_partial:
+        kwargs['n_elements'] = size - size // 3
+    if variation_selection.is_combination:
+        kwargs['is_combination'] = True
+    if variation_selection.is_fixed:
+        kwargs['fixed_map'] = {domain[0]: sequence[1]}
+    if variation_selection.is_degreed:
+        kwargs['degrees'] = (1, 3)
+    if variation_selection.is_typed:
+        kwargs['perm_type'] = BenchmarkComb if \
+                          variation_selection.is_combination else BenchmarkPerm
+    perm_space = PermSpace(**kwargs)
+    if variation_selection.is_sliced:
+        perm_space = perm_space[max(perm_space.length // 3, 1):]
+    assert perm_space.variation_selection == variation_selection
+    return perm_space
+
+
+def get_spread_indices(length, n_indices=10):
+    '''Get up to `n_indices` index numbers spread evenly over `length`.'''
+    return sorted(set((length - 1) * i // (n_indices - 1) for i in
+                                                         range(n_indices)))
+
+
+def iterate_sequence_space_benchmarks(name, make_space, sizes,
+                                      operations=('getitem', 'index',
+                                                  'iterate')):
+    '''
+    Iterate over benchmarks for a space like `PermSpace` or `ProductSpace`.
+    
+    `make_space` is a function that takes a size and returns the space. Yields
+    tuples of `(name, size, operation, function, n_items)`.
+    '''
+    for size in sizes:
+        space = make_space(size)
+        indices = get_spread_indices(space.length)
+        items = [space[i] for i in indices]
+        n_items_to_iterate = min(space.length, 100)
+        functions = {
+            'length': lambda make_space=make_space, size=size:
+                                                       make_space(size).length,
+            'getitem': lambda space=space, indices=indices:
+                                                   [space[i] for i in indices],
+            'index': lambda space=space, items=items:
+                                         [space.index(item) for item in items],
+            'iterate': lambda space=space, n=n_items_to_iterate:
+                                              list(itertools.islice(space, n)),
+        }
+        n_items = {'length': 1, 'getitem': len(indices), 'index': len(items),
+                   'iterate': n_items_to_iterate}
+        for operation in operations:
+            yield (name, size, operation, functions[operation],
+                   n_items[operation])
+
+
+def iterate_benchmarks(sizes):
+    '''
+    Iterate over all the benchmarks, at the given sizes.
+    
+    Yields tuples of `(name, size, operation, function, n_items)`, where
+    `n_items` is the number of items that one call to `function` handles.
+    '''
+    for variation_selection in \
+             variations.variation_selection_space.allowed_variation_selections:
+        if variation_selection.is_combination and \
+               variation_selection.is_sliced and \
+                                           not variation_selection.is_partial:
+            # A combination space that isn't partial has just one comb, so
+            # slicing it would leave it empty.
+            continue
+        for benchmark in iterate_sequence_space_benchmarks(
+            'PermSpace/%s' % get_variation_selection_name(variation_selection),
+            lambda size, variation_selection=variation_selection:
+                             make_perm_space(variation_selection, size),
+            sizes, operations=('length', 'getitem', 'index', 'iterate')):
+            yield benchmark
+    
+    space_makers = (
+        ('CombSpace', lambda size: CombSpace(size, size // 2)),
+        ('ProductSpace', lambda size: ProductSpace((range(size),) * 4)),
+        ('ChainSpace', lambda size: ChainSpace(
+            tuple(range(100 * i, 100 * i + 10 * size) for i in range(size))
+        )),
+        ('SelectionSpace', lambda size: SelectionSpace(range(size))),
+    )
+    for name, make_space in space_makers:
+        for benchmark in iterate_sequence_space_benchmarks(name, make_space,
+                                                           sizes):
+            yield benchmark
+    for benchmark in iterate_sequence_space_benchmarks(
+        'MapSpace', lambda size: MapSpace(abs, range(-size * 10, size * 10)),
+        sizes, operations=('getitem', 'iterate')):
+        yield benchmark
+    
+    for name, calculate in (
+        ('calculate_length_of_recurrent_perm_space',
+         calculating_length.calculate_length_of_recurrent_perm_space),
+        ('calculate_length_of_recurrent_comb_space',
+         calculating_length.calculate_length_of_recurrent_comb_space)):
+        for size in sizes:
+            # Every item appears 1, 2 or 3 times:
+            fbb = nifty_collections.FrozenBagBag(
+                [1 + i % 3 for i in range(size)]
+            )
+            for engine in ('polynomial', 'fbb'):
+                # Each run gets an empty cache of its own, so we measure the
+                # whole calculation without touching the global caches:
+                def function(calculate=calculate, size=size, fbb=fbb,
+                             engine=engine):
+                    return calculate(size, fbb, engine=engine,
+                                     cache=calculating_length.LengthCache())
+                yield name, size, engine, function, 1
+    
+    for size in sizes:
+        # Creating a space should be quick even when the sequence is long, so
+        # we use much longer sequences here:
+        sequence_length = size ** 5
+        sequence = tuple('s%s' % i for i in range(sequence_length))
+        construction_arguments = (
+            ('pure', (sequence_length,), {}),
+            ('rapplied', (sequence,), {}),
+            ('dapplied', (sequence_length,), {'domain': sequence}),
+            ('partial', (sequence,), {'n_elements': size}),
+            ('fixed', (sequence,),
+                         {'fixed_map': {i: sequence[i] for i in range(size)}}),
+        )
+        for operation, args, kwargs in construction_arguments:
+            yield ('PermSpace.__init__', size, operation,
+                   lambda args=args, kwargs=kwargs: PermSpace(*args, **kwargs),
+                   1)
+
+
+def run(sizes=default_sizes, min_time=0.1, name_filter=None,
+        output=sys.stdout):
+    '''
+    Run the benchmarks and write the results to `output` as JSON lines.
+    
+    `name_filter` may be a string; if it's given, only benchmarks that have it
+    in their name are run. Returns a list of the results as dicts.
+    '''
+    environment = {
+        'combi_version': combi.__version__,
+        'python_version': platform.python_version(),
+        'python_implementation': platform.python_implementation(),
+    }
+    results = []
+    for name, size, operation, function, n_items in \
+                                                   iterate_benchmarks(sizes):
+        if name_filter is not None and name_filter not in name:
+            continue
+        n_calls, seconds_per_call = time_function(function,
+                                                  min_time=min_time)
+        result = dict(environment)
+        result.update({
+            'benchmark': name,
+            'size': size,
+            'operation': operation,
+            'n_calls': n_calls,
+            'seconds_per_call': seconds_per_call,
+            'seconds_per_item': seconds_per_call / n_items,
+        })
+        results.append(result)
+        if output is not None:
+            output.write(json.dumps(result, sort_keys=True) + '\n')
+            output.flush()
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m test_combi.benchmarks',
+        description="Benchmark combi's spaces, writing results as JSON lines."
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=None,
+                        help='Sizes of spaces to benchmark. (Minimum 4.)')
+    parser.add_argument('--quick', action='store_true',
+                        help='Use small sizes and short timings.')
+    parser.add_argument('--filter', default=None, dest='name_filter',
+                        help='Only run benchmarks with this in their name.')
+    parser.add_argument('--output', default=None,
+                        help='File to write results to, instead of stdout.')
+    parsed_args = parser.parse_args(args)
+    sizes = parsed_args.sizes or (quick_sizes if parsed_args.quick else
+                                  default_sizes)
+    min_time = 0.01 if parsed_args.quick else 0.1
+    if parsed_args.output is None:
+        run(sizes, min_time=min_time, name_filter=parsed_args.name_filter)
+    else:
+        with open(parsed_args.output, 'w') as output:
+            run(sizes, min_time=min_time,
+                name_filter=parsed_args.name_filter, output=output)
+
+
+if __name__ == '__main__':
+    main()
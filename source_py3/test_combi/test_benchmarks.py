@@ -0,0 +1,79 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import json
+
+from combi import *
+from combi.perming import calculating_length
+from combi.perming import variations
+
+from . import benchmarks
+
+
+def test_benchmarks():
+    results = benchmarks.run(sizes=(4,), min_time=0, output=None)
+    benchmark_names = set(result['benchmark'] for result in results)
+    for variation_selection in \
+             variations.variation_selection_space.allowed_variation_selections:
+        name = 'PermSpace/%s' % \
+                  benchmarks.get_variation_selection_name(variation_selection)
+        assert (name in benchmark_names) == (
+            variation_selection.is_partial or
+            not (variation_selection.is_combination and
+                 variation_selection.is_sliced)
+        )
+    for name in ('CombSpace', 'ProductSpace', 'ChainSpace', 'MapSpace',
+                 'SelectionSpace', 'calculate_length_of_recurrent_perm_space',
+                 'calculate_length_of_recurrent_comb_space'):
+        assert name in benchmark_names
+    assert [(result['operation'], result['size']) for result in results if
+            result['benchmark'] == 'PermSpace/pure'] == \
+            [('length', 4), ('getitem', 4), ('index', 4), ('iterate', 4)]
+    for result in results:
+        assert result['n_calls'] >= 1
+        assert 0 < result['seconds_per_item'] <= result['seconds_per_call']
+
+
+def test_benchmarks_command_line(tmpdir):
+    path = str(tmpdir.join('results.jsonl'))
+    benchmarks.main(['--quick', '--sizes', '4', '--filter', 'SelectionSpace',
+                     '--output', path])
+    with open(path) as file:
+        results = [json.loads(line) for line in file]
+    assert [result['operation'] for result in results] == \
+                                                ['getitem', 'index', 'iterate']
+    for result in results:
+        assert result['benchmark'] == 'SelectionSpace'
+        assert result['size'] == 4
+        assert 'combi_version' in result and 'python_version' in result
+    
+    
+def test_length_engine_benchmarks():
+    global_caches = (calculating_length.length_of_recurrent_perm_space_cache,
+                     calculating_length.length_of_recurrent_comb_space_cache)
+    get_lengths = lambda: (PermSpace('aabbc', n_elements=3).length,
+                           CombSpace('aabbc', 3).length)
+    get_lengths()
+    results = benchmarks.run(sizes=(5,), min_time=0,
+                             name_filter='calculate_length', output=None)
+    # The benchmarks didn't clear the global caches:
+    n_misses = [cache.misses for cache in global_caches]
+    get_lengths()
+    assert [cache.misses for cache in global_caches] == n_misses
+    assert sorted((result['benchmark'], result['operation']) for result in
+                  results) == [
+        ('calculate_length_of_recurrent_comb_space', 'fbb'),
+        ('calculate_length_of_recurrent_comb_space', 'polynomial'),
+        ('calculate_length_of_recurrent_perm_space', 'fbb'),
+        ('calculate_length_of_recurrent_perm_space', 'polynomial'),
+    ]
+    
+    
+def test_construction_benchmarks():
+    results = benchmarks.run(sizes=(4,), min_time=0,
+                             name_filter='PermSpace.__init__', output=None)
+    assert [result['operation'] for result in results] == \
+                          ['pure', 'rapplied', 'dapplied', 'partial', 'fixed']
+    for result in results:
+        assert result['size'] == 4
+        assert result['seconds_per_call'] > 0
@@ -0,0 +1,59 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import itertools
+
+from combi._python_toolbox import math_tools
+from combi.perming.combinadic import *
+
+
+def test_unrank_and_rank_combination():
+    for sequence_length in range(10):
+        for n_elements in range(sequence_length + 1):
+            combinations = list(
+                itertools.combinations(range(sequence_length), n_elements)
+            )
+            for search in (None, True, False):
+                assert [unrank_combination(i, sequence_length, n_elements,
+                                           search=search) for i in
+                        range(len(combinations))] == combinations
+                assert [rank_combination(combination, sequence_length,
+                                         search=search) for combination in
+                        combinations] == list(range(len(combinations)))
+
+
+def test_big_combinations():
+    for sequence_length, n_elements in ((10000, 50), (300, 120), (5000, 3),
+                                        (2000, 1999)):
+        length = math_tools.binomial(sequence_length, n_elements)
+        for i in (0, 1, length // 7, length // 3, length - 2, length - 1):
+            combination = unrank_combination(i, sequence_length, n_elements,
+                                             search=True)
+            assert combination == unrank_combination(
+                i, sequence_length, n_elements, search=False
+            )
+            assert len(combination) == n_elements
+            assert list(combination) == sorted(set(combination))
+            assert rank_combination(combination, sequence_length,
+                                    search=True) == i
+            assert rank_combination(combination, sequence_length,
+                                    search=False) == i
+
+
+def test_revolving_door():
+    for sequence_length in range(10):
+        for n_elements in range(sequence_length + 1):
+            combinations = list(
+                iterate_revolving_door(sequence_length, n_elements)
+            )
+            assert sorted(combinations) == list(
+                itertools.combinations(range(sequence_length), n_elements)
+            )
+            for combination, next_combination in zip(combinations,
+                                                     combinations[1:]):
+                assert len(set(combination) ^ set(next_combination)) == 2
+    assert list(iterate_revolving_door(5, 3)) == [
+        (0, 1, 2), (0, 2, 3), (1, 2, 3), (0, 1, 3), (0, 3, 4), (1, 3, 4),
+        (2, 3, 4), (0, 2, 4), (1, 2, 4), (0, 1, 4)
+    ]
+    assert list(iterate_revolving_door(3, 4)) == []
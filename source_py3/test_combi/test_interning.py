@@ -0,0 +1,88 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import gc
+
+from combi import *
+from combi.perming.interning import *
+
+
+def test_interning_off_by_default():
+    assert PermSpace.interning_table is None
+    assert PermSpace(5) == PermSpace(5)
+    assert PermSpace(5) is not PermSpace(5)
+
+
+def test_interning():
+    PermSpace.interning_table = interning_table = InterningTable()
+    try:
+        assert PermSpace('abc', n_elements=2) is \
+                                                PermSpace('abc', n_elements=2)
+        assert PermSpace(['a', 'b'], n_elements=1) is \
+                                           PermSpace(('a', 'b'), n_elements=1)
+        assert PermSpace(4, fixed_map={1: 2}) is PermSpace(4, fixed_map={1: 2})
+        assert PermSpace(4)[1:5] is PermSpace(4)[1:5]
+        assert PermSpace(4, is_combination=True) is \
+                                              PermSpace(4, is_combination=True)
+        assert CombSpace(4, 2) is CombSpace(4, 2)
+        assert PermSpace(4) is not PermSpace(4, n_elements=3)
+        assert CombSpace(4, 2) is not PermSpace(4, n_elements=2)
+        
+        # Items that are equal but of different types give different spaces:
+        assert PermSpace((1, 2, 3)) is not PermSpace((1.0, 2.0, 3.0))
+        assert PermSpace((1.0, 2.0, 3.0)).sequence == (1.0, 2.0, 3.0)
+        assert type(PermSpace((1.0, 2.0, 3.0)).sequence[0]) is float
+        assert PermSpace(('x', 1)) is not PermSpace(('x', True))
+        assert type(PermSpace(('x', True)).sequence[1]) is bool
+        assert PermSpace(3, fixed_map={0: 1}) is not \
+                                              PermSpace(3, fixed_map={0: True})
+        assert PermSpace(3, domain=(0, 1, 2)) is not \
+                                               PermSpace(3, domain=(0.0, 1, 2))
+        
+        # Spaces made from an iterator aren't shared:
+        assert PermSpace(iter('abc')) == PermSpace(('a', 'b', 'c'))
+        assert PermSpace(iter('abc')) is not PermSpace(iter('abc'))
+        
+        # Derived spaces of equal spaces are shared:
+        perm_space = PermSpace('abcd', domain='wxyz', fixed_map={'w': 'c'})
+        other_perm_space = PermSpace('abcd', domain='wxyz',
+                                     fixed_map={'w': 'c'})
+        assert perm_space.unfixed.undapplied is \
+                                          other_perm_space.unfixed.undapplied
+        assert perm_space[1].nominal_perm_space is \
+                                         other_perm_space[2].nominal_perm_space
+        
+        # Spaces with a prefix, made by `index`, don't get shared:
+        fixed_perm_space = PermSpace(5, fixed_map={0: 3, 1: 4})
+        assert fixed_perm_space.index(fixed_perm_space[4]) == 4
+        assert PermSpace(3).prefix is None
+        
+        stats = interning_table.get_stats()
+        assert stats['hits'] >= 9
+        assert stats['size'] == len(interning_table)
+        assert stats['max_size'] == 1000
+        interning_table.clear()
+        assert len(interning_table) == interning_table.hits == \
+                                                   interning_table.misses == 0
+    finally:
+        PermSpace.interning_table = None
+
+
+def test_interning_table_is_bounded():
+    PermSpace.interning_table = interning_table = InterningTable(max_size=3)
+    try:
+        kept_perm_space = PermSpace(20)
+        for i in range(10):
+            PermSpace(i)
+        gc.collect()
+        # The last 3 spaces are held, plus the one that we're holding:
+        assert len(interning_table) == 4
+        assert PermSpace(20) is kept_perm_space
+        assert PermSpace(9) is PermSpace(9)
+        key = get_interning_key(PermSpace, (20,), {})
+        assert key in interning_table
+        assert get_interning_key(PermSpace, (iter('ab'),), {}) is None
+        assert get_interning_key(PermSpace, ('ab',),
+                                 {'domain': [[1], [2]]}) is None
+    finally:
+        PermSpace.interning_table = None
@@ -1,6 +1,10 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+import pytest
+
+from combi._python_toolbox import cute_testing
+
 from combi import *
 
 
@@ -29,5 +33,27 @@ def test():
     assert SelectionSpace(range(5)) != SelectionSpace(range(5, 0, -1))
     
     
+def test_get_many():
+    selection_space = SelectionSpace(range(5))
+    indices = (0, 31, -1, 7, 7, 12)
+    assert selection_space.get_many(indices) == \
+                                       [selection_space[i] for i in indices]
+    assert selection_space.get_many(()) == []
+    with cute_testing.RaiseAssertor(IndexError):
+        selection_space.get_many((32,))
+    
+    
+def test_to_array():
+    numpy = pytest.importorskip('numpy')
+    selection_space = SelectionSpace(range(5))
+    mask = selection_space.to_array()
+    assert mask.dtype == bool
+    assert mask.shape == (32, 5)
+    assert [set(numpy.flatnonzero(row)) for row in mask] == \
+                                                          list(selection_space)
+    assert (selection_space.to_array(3, 9) == mask[3:9]).all()
     
-    
\ No newline at end of file
+    huge_selection_space = SelectionSpace(range(100))
+    mask = huge_selection_space.to_array(-3)
+    assert [set(numpy.flatnonzero(row)) for row in mask] == \
+                                [huge_selection_space[i] for i in (-3, -2, -1)]